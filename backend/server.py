@@ -2,12 +2,16 @@ from fastapi import FastAPI, APIRouter, HTTPException, BackgroundTasks
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 
+from processors.pipeline2 import process_job_batch, close_shared_session
+
 # Degree Programs to Career Mapping endpoint
 @api_router.get("/degree-programs")
 async def get_degree_programs():
@@ -347,16 +351,20 @@ async def process_scraped_jobs(job_ids: List[str]):
         # Process through pipeline
         processed_jobs = await process_job_batch(raw_jobs, batch_size=3)
         
-        # Store processed jobs
-        for processed_job in processed_jobs:
+        # Store processed jobs in a single round trip; unordered so one bad
+        # document does not stop the rest
+        if processed_jobs:
             try:
-                await db.processed_jobs.replace_one(
-                    {"id": processed_job["id"]}, 
-                    processed_job, 
-                    upsert=True
+                await db.processed_jobs.bulk_write(
+                    [
+                        ReplaceOne({"id": processed_job["id"]}, processed_job, upsert=True)
+                        for processed_job in processed_jobs
+                    ],
+                    ordered=False
                 )
-            except Exception as e:
-                logger.error(f"Error storing processed job: {e}")
+            except BulkWriteError as e:
+                for error in e.details.get("writeErrors", []):
+                    logger.error(f"Error storing processed job: {error.get('errmsg')}")
                 
         logger.info(f"Successfully processed {len(processed_jobs)} jobs")
         
@@ -1897,3 +1905,4 @@ logger = logging.getLogger(__name__)
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
+    await close_shared_session()
@@ -5,22 +5,274 @@ Processes scraped job listings and extracts structured information
 
 import asyncio
 import aiohttp
-from bs4 import BeautifulSoup
-from typing import Dict, List, Optional, Any
+import ahocorasick
+import diskcache
+import hashlib
+import lxml.html
+from lxml import etree
+from typing import Dict, Iterator, List, Optional, Any, Literal
+from itertools import islice
+import random
 import re
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
 import logging
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import json
+import orjson
+import numpy as np
 from emergentintegrations.llm.chat import LlmChat, UserMessage
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.exceptions import OutputParserException
+from langchain_core.messages import SystemMessage
+from langchain_core.rate_limiters import InMemoryRateLimiter
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from openai import AsyncOpenAI, APIConnectionError, InternalServerError, RateLimitError
+from langchain_core.runnables import RunnableSequence
+from pydantic import BaseModel, Field, ValidationError, field_validator
 import os
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from pathlib import Path
 logger = logging.getLogger(__name__)
 
-class JobProcessor:
-    def __init__(self):
-        self.session = None
-        self.ai_client = None
-        self._init_ai_client()
+# Regex patterns for abbreviation normalization
+DEGREE_RE = re.compile(r"\b(?:B\.S\.|B\.A\.|M\.S\.|M\.A\.|Ph\.D\.)(?!\w)", re.IGNORECASE)
+DEGREE_REPLACEMENTS = {
+    "BS": "Bachelor of Science",
+    "BA": "Bachelor of Arts",
+    "MS": "Master of Science",
+    "MA": "Master of Arts",
+    "PHD": "Doctor of Philosophy",
+}
+SALARY_NUMBER_RE = re.compile(r"\d+")
+URL_RE = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+
+# Keyword tables for the JobProcessor extractors, in priority order
+JOB_TYPE_KEYWORDS = {
+    'full-time': ['full time', 'full-time', 'permanent', 'regular'],
+    'part-time': ['part time', 'part-time'],
+    'contract': ['contract', 'contractor', 'temporary', 'temp'],
+    'internship': ['intern', 'internship', 'graduate program'],
+    'remote': ['remote', 'work from home', 'wfh'],
+    'freelance': ['freelance', 'consultant', 'independent']
+}
+
+BENEFITS_KEYWORDS = [
+    'health insurance', 'medical', 'dental', 'vision',
+    'vacation', 'pto', 'paid time off', 'sick leave',
+    'retirement', '401k', 'pension', 'bonus',
+    'remote work', 'flexible hours', 'work from home',
+    'training', 'professional development', 'certification',
+    'gym', 'wellness', 'transport', 'parking'
+]
+
+EDUCATION_LEVELS = [
+    'Bachelor', 'Master', 'PhD', 'Doctorate', 'Degree',
+    'Diploma', 'Certificate', 'Associate'
+]
+
+INDUSTRY_KEYWORDS = {
+    'Technology': ['software', 'tech', 'it', 'developer', 'engineer', 'programming'],
+    'Finance': ['finance', 'banking', 'fintech', 'accounting', 'investment'],
+    'Healthcare': ['health', 'medical', 'hospital', 'clinical', 'pharma'],
+    'Education': ['education', 'teaching', 'university', 'academic', 'research'],
+    'Marketing': ['marketing', 'advertising', 'digital marketing', 'seo', 'social media'],
+    'Sales': ['sales', 'business development', 'account manager', 'customer success'],
+    'Manufacturing': ['manufacturing', 'production', 'factory', 'industrial'],
+    'Retail': ['retail', 'e-commerce', 'store', 'merchandise'],
+    'Consulting': ['consulting', 'advisory', 'strategy', 'management consulting']
+}
+
+KENYAN_CITIES = ['Nairobi', 'Mombasa', 'Kisumu', 'Nakuru', 'Eldoret', 'Thika', 'Machakos']
+
+SOFT_SKILLS = ('communication', 'leadership', 'teamwork', 'problem solving', 'analytical')
+
+# Text patterns for the JobExtractor fallbacks, compiled once at import
+COMPANY_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'Company:\s*([^\n]+)',
+    r'Employer:\s*([^\n]+)',
+    r'Organization:\s*([^\n]+)'
+))
+
+YEARS_EXPERIENCE_RE = re.compile(r'(\d+)[\+\-\s]*years?\s+experience')
+EXPERIENCE_LEVEL_PATTERNS = tuple((re.compile(pattern), level) for pattern, level in (
+    (r'entry[\s\-]?level', 'Entry Level'),
+    (r'junior', 'Junior'),
+    (r'senior', 'Senior'),
+    (r'lead', 'Lead'),
+    (r'principal', 'Principal'),
+    (r'manager', 'Manager'),
+    (r'director', 'Director')
+))
+
+SALARY_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'salary:?\s*([^\n]+)',
+    r'compensation:?\s*([^\n]+)',
+    r'ksh\s*[\d,]+',
+    r'kes\s*[\d,]+',
+    r'\$\s*[\d,]+',
+    r'[\d,]+\s*-\s*[\d,]+\s*(?:per|/)\s*(?:month|year)'
+))
+
+REQUIREMENTS_SECTION_RE = re.compile(
+    r'(?:requirements?|qualifications?|must have|essential)[:\n](.*?)(?=\n[A-Z]|\n\n|$)',
+    re.IGNORECASE | re.DOTALL
+)
+REQUIREMENT_SPLIT_RE = re.compile(r'[•\n]\s*')
+
+# Section headings the trimmed extraction prompt window is anchored on
+CHAIN_ANCHOR_RE = re.compile(r'\b(?:requirements?|qualifications?|responsibilities)\b', re.IGNORECASE)
+
+# Common tech skills patterns
+SKILL_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'\b(?:Python|Java|JavaScript|TypeScript|C\+\+|C#|PHP|Ruby|Go|Rust|Swift|Kotlin)\b',
+    r'\b(?:React|Angular|Vue|Django|Flask|Spring|Laravel|Rails|Express)\b',
+    r'\b(?:AWS|Azure|GCP|Docker|Kubernetes|Jenkins|Git|Linux|Unix)\b',
+    r'\b(?:SQL|MySQL|PostgreSQL|MongoDB|Redis|Elasticsearch)\b',
+    r'\b(?:HTML|CSS|SASS|Bootstrap|Tailwind)\b',
+    r'\b(?:Machine Learning|AI|Data Science|Analytics|Statistics)\b'
+))
+
+DEADLINE_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'deadline:?\s*([^\n]+)',
+    r'closing date:?\s*([^\n]+)',
+    r'apply by:?\s*([^\n]+)'
+))
+
+
+# Structured selectors for the JobExtractor fields, in priority order, as
+# (tag, attribute, value); a tag of None matches any element
+FIELD_SELECTORS = {
+    'company': [
+        (None, 'class', 'company-name'), (None, 'class', 'company'), (None, 'data-testid', 'company-name'),
+        (None, 'class', 'employer-name'), (None, 'class', 'job-company'), ('span', 'class', 'companyName')
+    ],
+    'location': [
+        (None, 'class', 'location'), (None, 'class', 'job-location'), (None, 'data-testid', 'job-location'),
+        (None, 'class', 'workplace-location'), (None, 'class', 'job-address')
+    ],
+    'salary': [(None, 'class', name) for name in ['salary', 'compensation', 'pay', 'salaryText']],
+    'description': [(None, 'class', name) for name in [
+        'job-description', 'description', 'job-details',
+        'job-summary', 'overview', 'about-role'
+    ]],
+    'deadline': [(None, 'class', name) for name in ['deadline', 'closing-date', 'application-deadline']]
+}
+
+
+def _build_selector_index() -> Dict[tuple, List[tuple]]:
+    """Index FIELD_SELECTORS by (attribute, value) for the single-pass field scan"""
+    index: Dict[tuple, List[tuple]] = {}
+    for field, selectors in FIELD_SELECTORS.items():
+        for priority, (tag, attribute, value) in enumerate(selectors):
+            index.setdefault((attribute, value), []).append((field, priority, tag))
+    return index
+
+
+SELECTOR_INDEX = _build_selector_index()
+
+
+def _collect_fields(tree: etree._Element) -> Dict[str, etree._Element]:
+    """Find the element for every structured field in one walk of the tree
     
+    Gives the same element a select_one per selector, tried in priority
+    order, would: the first in document order for the highest-priority
+    selector that matches anything.
+    """
+    best: Dict[str, tuple] = {}
+    for elem in tree.iter(etree.Element):
+        keys = [('class', class_name) for class_name in (elem.get('class') or '').split()]
+        test_id = elem.get('data-testid')
+        if test_id:
+            keys.append(('data-testid', test_id))
+            
+        for key in keys:
+            for field, priority, tag in SELECTOR_INDEX.get(key, ()):
+                if tag is not None and elem.tag != tag:
+                    continue
+                current = best.get(field)
+                if current is None or priority < current[0]:
+                    best[field] = (priority, elem)
+                    
+    return {field: elem for field, (_, elem) in best.items()}
+
+
+def _node_text(elem: etree._Element, separator: str = '', limit: Optional[int] = None) -> str:
+    """Stripped text of an element, joined like BeautifulSoup's get_text(separator, strip=True)
+
+    With a limit, stops walking the element once that many characters are
+    collected and returns at most limit characters.
+    """
+    pieces = filter(None, (text.strip() for text in elem.itertext()))
+    if limit is None:
+        return separator.join(pieces)
+
+    collected = []
+    length = 0
+    for piece in pieces:
+        collected.append(piece)
+        length += len(piece) + len(separator)
+        if length >= limit:
+            break
+    return separator.join(collected)[:limit]
+
+
+# Fields requested from the AI for every job posting
+AI_ENHANCEMENT_FIELDS = """1. skills_analysis: Most important skills required (list of 5-10 skills)
+            2. experience_summary: Brief summary of experience requirements
+            3. role_level: Entry/Junior/Mid/Senior/Executive
+            4. remote_friendly: true/false based on remote work mentions
+            5. growth_potential: Low/Medium/High career growth potential
+            6. industry_category: Primary industry category
+            7. key_responsibilities: Top 3-5 main responsibilities"""
+
+# Characters of boilerplate-free page text sent to the AI per job
+AI_CONTENT_CHARS = 1500
+
+# Fewest words of page text worth an AI request; below this the prompt
+# scaffolding outweighs the posting and the reply is mostly guesswork
+AI_MIN_CONTENT_WORDS = 30
+
+# Page chrome dropped before summarizing a job posting for the AI
+BOILERPLATE_TAGS = ('nav', 'header', 'footer', 'aside', 'form', 'iframe', 'svg')
+
+
+def _build_keyword_automaton() -> ahocorasick.Automaton:
+    """Build one Aho-Corasick automaton over every extractor keyword.
+
+    Each keyword maps to the (category, tag) pairs it signals, so a single
+    pass over the lowercased text yields the hits for all extractors.
+    """
+    tags_by_keyword: Dict[str, List[tuple]] = {}
+
+    def add(keyword: str, category: str, tag: str):
+        tags_by_keyword.setdefault(keyword, []).append((category, tag))
+
+    for job_type, keywords in JOB_TYPE_KEYWORDS.items():
+        for keyword in keywords:
+            add(keyword, 'job_type', job_type)
+    for benefit in BENEFITS_KEYWORDS:
+        add(benefit, 'benefits', benefit)
+    for level in EDUCATION_LEVELS:
+        add(level.lower(), 'education', level)
+    for industry, keywords in INDUSTRY_KEYWORDS.items():
+        for keyword in keywords:
+            add(keyword, 'industry', industry)
+    for city in KENYAN_CITIES:
+        add(city.lower(), 'location', city)
+    for skill in SOFT_SKILLS:
+        add(skill, 'soft_skills', skill.title())
+
+    automaton = ahocorasick.Automaton()
+    for keyword, tags in tags_by_keyword.items():
+        automaton.add_word(keyword, tuple(tags))
+    automaton.make_automaton()
+    return automaton
+
+
+KEYWORD_AUTOMATON = _build_keyword_automaton()
+
 
 # Enhanced data models with validation
 class JobClassification(BaseModel):
@@ -29,7 +281,8 @@ class JobClassification(BaseModel):
     function: Optional[str] = None
     department: Optional[str] = None
 
-    @validator('level')
+    @field_validator('level')
+    @classmethod
     def validate_level(cls, v):
         if v:
             valid_levels = ['entry', 'junior', 'mid', 'senior', 'lead', 'manager', 'director', 'executive']
@@ -47,7 +300,8 @@ class LocationWork(BaseModel):
     hybrid: Optional[bool] = None
     travel_required: Optional[str] = None
 
-    @validator('office_location')
+    @field_validator('office_location')
+    @classmethod
     def clean_location(cls, v):
         if v:
             return v.strip().title()
@@ -62,8 +316,9 @@ class SkillsTaxonomy(BaseModel):
     programming_languages: List[str] = Field(default_factory=list)
     frameworks: List[str] = Field(default_factory=list)
 
-    @validator('technical_skills', 'soft_skills', 'tools_technologies',
-               'programming_languages', 'frameworks', pre=True)
+    @field_validator('technical_skills', 'soft_skills', 'tools_technologies',
+                     'programming_languages', 'frameworks', mode='before')
+    @classmethod
     def clean_skills_list(cls, v):
         if isinstance(v, str):
             return [skill.strip() for skill in v.split(',') if skill.strip()]
@@ -78,7 +333,8 @@ class Certification(BaseModel):
     year: Optional[int] = None
     required: Optional[bool] = False
 
-    @validator('year')
+    @field_validator('year')
+    @classmethod
     def validate_year(cls, v):
         if v and (v < 1950 or v > datetime.now().year + 5):
             return None
@@ -99,7 +355,8 @@ class CompensationBenefits(BaseModel):
     salary_type: Optional[str] = None  # hourly, annual, contract
     benefits: List[str] = Field(default_factory=list)
 
-    @validator('salary_min', 'salary_max')
+    @field_validator('salary_min', 'salary_max')
+    @classmethod
     def validate_salary(cls, v):
         if v and (v < 0 or v > 10000000):  # Reasonable bounds for salary
             return None
@@ -117,7 +374,8 @@ class EducationRequirement(BaseModel):
     years_experience_substitute: Optional[int] = None
     confidence_score: float = Field(ge=0.0, le=1.0)
 
-    @validator('field')
+    @field_validator('field')
+    @classmethod
     def clean_field(cls, v):
         if v:
             return v.lower().strip()
@@ -126,7 +384,18 @@ class EducationRequirement(BaseModel):
 
 class EducationExtraction(BaseModel):
     requirements: List[EducationRequirement]
-    raw_text_analyzed: str
+    raw_text_analyzed: str = Field(default="")
+
+    @classmethod
+    def from_trusted(cls, data: Dict[str, Any]) -> "EducationExtraction":
+        """Rebuild from our own model_dump output without re-running validators
+
+        Never use this on LLM output or any other untrusted input.
+        """
+        return cls.model_construct(**{
+            **data,
+            "requirements": [EducationRequirement.model_construct(**r) for r in data.get("requirements", [])],
+        })
 
 
 class JobExtraction(BaseModel):
@@ -157,28 +426,222 @@ class JobExtraction(BaseModel):
     raw_text_analyzed: str = Field(default="")
     processing_timestamp: str = Field(default_factory=lambda: datetime.now().isoformat())
 
-    @validator('full_link')
+    @field_validator('full_link')
+    @classmethod
     def validate_url(cls, v):
         if v and not URL_RE.match(v):
-            logger.warning(f"Invalid URL format: {v}")
+            logger.warning("Invalid URL format: %s", v)
         return v
 
-    @validator('post_date', 'application_deadline')
+    @field_validator('post_date', 'application_deadline')
+    @classmethod
     def validate_dates(cls, v):
         if v:
             try:
-                # Try to parse common date formats
+                # ISO dates are the common case and parse in C
+                date.fromisoformat(v)
+                return v
+            except ValueError:
+                pass
+            try:
+                # Try to parse the other common date formats
                 for fmt in ['%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y', '%B %d, %Y']:
                     try:
                         datetime.strptime(v, fmt)
                         return v
                     except ValueError:
                         continue
-                logger.warning(f"Could not parse date: {v}")
+                logger.warning("Could not parse date: %s", v)
             except Exception:
                 pass
         return v
 
+    @classmethod
+    def from_trusted(cls, data: Dict[str, Any]) -> "JobExtraction":
+        """Rebuild from our own model_dump output without re-running validators
+
+        Never use this on LLM output or any other untrusted input.
+        """
+        return cls.model_construct(**{
+            **data,
+            "job_classification": JobClassification.model_construct(**data.get("job_classification", {})),
+            "location_and_work": LocationWork.model_construct(**data.get("location_and_work", {})),
+            "skills": SkillsTaxonomy.model_construct(**data.get("skills", {})),
+            "certifications": [Certification.model_construct(**c) for c in data.get("certifications", [])],
+            "career_progression": CareerProgression.model_construct(**data.get("career_progression", {})),
+            "compensation": CompensationBenefits.model_construct(**data.get("compensation", {})),
+            "education_requirements": [
+                EducationRequirement.model_construct(**r) for r in data.get("education_requirements", [])
+            ],
+        })
+
+
+class CombinedExtraction(BaseModel):
+    job: JobExtraction
+    education: EducationExtraction
+
+    @classmethod
+    def from_trusted(cls, data: Dict[str, Any]) -> "CombinedExtraction":
+        """Rebuild from our own model_dump output without re-running validators
+
+        Never use this on LLM output or any other untrusted input.
+        """
+        return cls.model_construct(
+            job=JobExtraction.from_trusted(data["job"]),
+            education=EducationExtraction.from_trusted(data["education"])
+        )
+
+
+class CombinedExtractionBatch(BaseModel):
+    postings: List[CombinedExtraction]
+
+
+# What the extraction prompts ask for from each job posting
+EXTRACTION_INSTRUCTIONS = """For the "job" object, focus on extracting:
+            1. Basic job details (title, company, location, dates)
+            2. Job classification (category, level, function, department)
+            3. Work arrangement (remote/onsite/hybrid, location details)
+            4. Skills taxonomy (technical skills, soft skills, tools, programming languages, frameworks)
+            5. Certifications (name, issuer, whether required)
+            6. Career progression opportunities
+            7. Compensation and benefits
+            8. Experience requirements
+
+            For the "education" object, determine for each education requirement:
+            1. Education level (high_school, certificate, diploma, associate, bachelor, master, phd, professional_license, none_specified, equivalent_experience)
+            2. Field of study (if specified)
+            3. Whether it's required, preferred, or equivalent experience is accepted
+            4. How many years of experience can substitute for the education
+            5. Confidence score (0.0-1.0) for the extraction accuracy
+
+            Consider phrases like:
+            - "Bachelor's degree required" → required
+            - "Master's preferred" → preferred  
+            - "Degree or equivalent experience" → equivalent_experience_accepted
+            - "5 years experience in lieu of degree" → years_experience_substitute: 5
+
+            Be thorough but accurate. If information is not clearly stated, use null/empty values."""
+
+
+class BatchExtractionFailed(Exception):
+    """A batched extraction did not return a result for this posting"""
+
+
+# Failures worth retrying: the same request can succeed once the provider recovers,
+# and a missing or invalid function call can come out well-formed on the next sample
+RETRYABLE_ERRORS = (
+    RateLimitError, APIConnectionError, InternalServerError, BatchExtractionFailed,
+    OutputParserException, ValidationError
+)
+
+# Bounds of the jittered delay between extraction retries, in seconds
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 10.0
+
+
+def _next_backoff(previous: float) -> float:
+    """Decorrelated-jitter delay to wait before the next retry"""
+    return min(RETRY_MAX_DELAY, random.uniform(RETRY_BASE_DELAY, previous * 3))
+
+
+def _start_flight(inflight: Dict[str, asyncio.Future], key: str) -> asyncio.Future:
+    """Register an in-flight request for key that duplicate requests can await"""
+    future = asyncio.get_running_loop().create_future()
+    # Retrieve the exception even when nobody waited, so it is not reported as unhandled
+    future.add_done_callback(lambda f: f.cancelled() or f.exception())
+    inflight[key] = future
+    return future
+
+
+async def _singleflight(inflight: Dict[str, asyncio.Future], key: str, call) -> Any:
+    """Await call(), or share the result of the identical call already in flight for key"""
+    if key in inflight:
+        return await asyncio.shield(inflight[key])
+
+    future = _start_flight(inflight, key)
+    try:
+        result = await call()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        del inflight[key]
+    future.set_result(result)
+    return result
+
+
+def _readonly_uri(path: str) -> str:
+    """SQLite URI opening the database at path read-only"""
+    return Path(path).resolve().as_uri() + "?mode=ro"
+
+
+def _upsert_job_sql(table: str, columns: tuple, extra_updates: str = "") -> str:
+    """Build an INSERT ... ON CONFLICT(job_id) DO UPDATE for a one-row-per-job table
+
+    Unlike INSERT OR REPLACE this updates the row in place, so columns that
+    are not written (e.g. created_at) keep their values.
+    """
+    updates = ", ".join(f"{column} = excluded.{column}" for column in columns if column != "job_id")
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+        f"ON CONFLICT(job_id) DO UPDATE SET {updates}{extra_updates}"
+    )
+
+
+# Statements run for every stored job, built once so sqlite3's statement cache reuses them
+UPSERT_JOBS_META_SQL = _upsert_job_sql("jobs_meta", (
+    "job_id", "full_link", "title_clean", "company", "company_location", "post_date",
+    "industry", "job_type", "job_category", "job_description", "application_deadline",
+    "additional_requirements", "experience_required", "company_size", "processing_timestamp"
+), ", updated_at = CURRENT_TIMESTAMP")
+UPSERT_JOB_CLASSIFICATION_SQL = _upsert_job_sql("job_classification", (
+    "job_id", "category", "level", "function", "department"
+))
+UPSERT_LOCATION_WORK_SQL = _upsert_job_sql("location_work", (
+    "job_id", "office_location", "remote", "onsite", "hybrid", "travel_required"
+))
+UPSERT_SKILLS_TAXONOMY_SQL = _upsert_job_sql("skills_taxonomy", (
+    "job_id", "main_skill", "technical_skills", "soft_skills", "tools_technologies",
+    "programming_languages", "frameworks"
+))
+UPSERT_CAREER_PROGRESSION_SQL = _upsert_job_sql("career_progression", (
+    "job_id", "entry_level", "mid_level", "senior_level", "growth_opportunities"
+))
+UPSERT_COMPENSATION_SQL = _upsert_job_sql("compensation", (
+    "job_id", "salary_min", "salary_max", "currency", "salary_type", "benefits"
+))
+INSERT_CERTIFICATION_SQL = (
+    "INSERT INTO certifications (job_id, name, issuer, year, required) VALUES (?, ?, ?, ?, ?)"
+)
+INSERT_EDUCATION_REQUIREMENT_SQL = (
+    "INSERT INTO education_requirements "
+    "(job_id, level, field, requirement_type, years_experience_substitute, confidence_score) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+MARK_COMPLETED_SQL = (
+    "INSERT INTO processing_status (job_id, status, last_attempt) VALUES (?, 'completed', CURRENT_TIMESTAMP) "
+    "ON CONFLICT(job_id) DO UPDATE SET status = excluded.status, error_message = NULL, "
+    "last_attempt = excluded.last_attempt"
+)
+MARK_ERROR_SQL = (
+    "INSERT INTO processing_status (job_id, status, error_message, retry_count, last_attempt) "
+    "VALUES (?, 'error', ?, 1, CURRENT_TIMESTAMP) "
+    "ON CONFLICT(job_id) DO UPDATE SET status = excluded.status, error_message = excluded.error_message, "
+    "retry_count = processing_status.retry_count + 1, last_attempt = excluded.last_attempt"
+)
+
+# Per-job tables checked for rows whose job is missing from jobs_meta
+ORPHAN_CHECK_SQL = tuple(
+    (table, f"SELECT COUNT(*) FROM {table} c LEFT JOIN jobs_meta p ON c.job_id = p.job_id WHERE p.job_id IS NULL")
+    for table in (
+        "job_classification", "location_work", "skills_taxonomy", "certifications",
+        "career_progression", "compensation", "education_requirements"
+    )
+)
+
 
 class AcademicDetailsProcessor:
     def __init__(
@@ -189,80 +652,115 @@ class AcademicDetailsProcessor:
             temperature: float = 0.1,
             api_key: Optional[str] = None,
             batch_size: int = 10,
-            max_retries: int = 3
+            max_retries: int = 3,
+            postings_per_call: int = 4,
+            cache_similarity: float = 0.95,
+            base_url: Optional[str] = None,
+            long_context_model: Optional[str] = None,
+            long_context_chars: int = 6000,
+            max_chain_chars: Optional[int] = 4000,
+            requests_per_second: Optional[float] = None
     ):
+        """
+        Args:
+            base_url: OpenAI-compatible endpoint serving llm_model, e.g. a
+                local vLLM server at http://localhost:8000/v1. Defaults to
+                the LLM_BASE_URL env var, then to OpenAI.
+            long_context_model: OpenAI model for postings longer than
+                long_context_chars; by default llm_model handles every posting
+            max_chain_chars: Characters of each posting sent to llm_model, or
+                None to send postings whole
+            requests_per_second: Sustained rate of LLM calls, shared by both
+                models, with bursts of up to twice that; None leaves pacing
+                to the provider's rate limits and the retry backoff
+        """
         self.input_db_path = input_db_path
         self.output_db_path = output_db_path
         self.batch_size = batch_size
+        self.postings_per_call = postings_per_call
+        self.cache_similarity = cache_similarity
         self.max_retries = max_retries
+        self.long_context_chars = long_context_chars
+        self.max_chain_chars = max_chain_chars
 
-        # Initialize API key
+        # Initialize API key; a self-hosted endpoint does not need one
         key = api_key or os.getenv("OPENAI_API_KEY")
-        if not key:
+        base_url = base_url or os.getenv("LLM_BASE_URL")
+        if not key and (not base_url or long_context_model):
             raise ValueError("OpenAI API key must be set via parameter or OPENAI_API_KEY env var")
 
-        # Initialize LLM and parsers
-        self.llm = OpenAI(model=llm_model, temperature=temperature, openai_api_key=key)
-        self.job_parser = PydanticOutputParser(pydantic_object=JobExtraction)
-        self.education_parser = PydanticOutputParser(pydantic_object=EducationExtraction)
+        # Initialize LLMs; one token bucket paces calls across both models
+        self.rate_limiter = (
+            InMemoryRateLimiter(
+                requests_per_second=requests_per_second,
+                check_every_n_seconds=0.1,
+                max_bucket_size=max(1, round(requests_per_second * 2))
+            )
+            if requests_per_second else None
+        )
+        self.llm = ChatOpenAI(
+            model=llm_model, temperature=temperature, api_key=key or "EMPTY", base_url=base_url,
+            rate_limiter=self.rate_limiter
+        )
+        self.long_context_llm = (
+            ChatOpenAI(model=long_context_model, temperature=temperature, api_key=key, rate_limiter=self.rate_limiter)
+            if long_context_model else None
+        )
+        self.embeddings = OpenAIEmbeddings(model="text-embedding-3-small", api_key=key) if key else None
 
         # Create processing chains
-        self.job_chain = self._create_job_chain()
-        self.education_chain = self._create_education_chain()
+        self.extraction_chain = self._create_extraction_chain(self.llm)
+        self.long_context_chain = (
+            self._create_extraction_chain(self.long_context_llm) if self.long_context_llm else None
+        )
+        self.batch_extraction_chain = self._create_batch_extraction_chain()
+
+        # In-memory index over the extraction cache, loaded on first lookup
+        self._cache_hashes: Optional[List[str]] = None
+        self._cache_vectors: Optional[np.ndarray] = None
+
+        # Extractions currently being requested, keyed by posting text hash
+        self._inflight: Dict[str, asyncio.Future] = {}
 
         # Setup database
         self._setup_db()
 
-        logger.info(f"Processor initialized with model: {llm_model}")
+        # Writes are grouped into one transaction per batch_size stored jobs
+        self._conn = self._connect_output_db()
+        self._uncommitted_jobs = 0
 
-    def _create_job_chain(self) -> RunnableSequence:
-        """Create the job extraction chain"""
-        prompt = PromptTemplate.from_template(
-            """Extract comprehensive job information from the following job posting.
+        logger.info("Processor initialized with model: %s", llm_model)
 
-            Focus on extracting:
-            1. Basic job details (title, company, location, dates)
-            2. Job classification (category, level, function, department)
-            3. Work arrangement (remote/onsite/hybrid, location details)
-            4. Skills taxonomy (technical skills, soft skills, tools, programming languages, frameworks)
-            5. Certifications (name, issuer, whether required)
-            6. Career progression opportunities
-            7. Compensation and benefits
-            8. Experience requirements
-
-            Be thorough but accurate. If information is not clearly stated, use null/empty values.
-
-            Job Posting Text:
-            {text}
+    def _create_extraction_chain(self, llm: ChatOpenAI) -> RunnableSequence:
+        """Create the chain extracting job information and education requirements in one call
 
-            {format_instructions}"""
+        The instructions form a fixed system message and the posting text
+        comes last, so the provider's prompt prefix cache can reuse
+        everything but the posting. The schema is passed as a function
+        definition, and the model's arguments are validated into the models.
+        """
+        system_prompt = (
+            "Extract comprehensive job information and all education requirements from the job posting "
+            "sent by the user.\n\n" + EXTRACTION_INSTRUCTIONS
         )
-        return prompt | self.llm | self.job_parser
-
-    def _create_education_chain(self) -> RunnableSequence:
-        """Create the education requirements extraction chain"""
-        prompt = PromptTemplate.from_template(
-            """Analyze the job posting and extract all education requirements.
-
-            For each education requirement, determine:
-            1. Education level (high_school, certificate, diploma, associate, bachelor, master, phd, professional_license, none_specified, equivalent_experience)
-            2. Field of study (if specified)
-            3. Whether it's required, preferred, or equivalent experience is accepted
-            4. How many years of experience can substitute for the education
-            5. Confidence score (0.0-1.0) for the extraction accuracy
-
-            Consider phrases like:
-            - "Bachelor's degree required" → required
-            - "Master's preferred" → preferred  
-            - "Degree or equivalent experience" → equivalent_experience_accepted
-            - "5 years experience in lieu of degree" → years_experience_substitute: 5
-
-            Job Posting Text:
-            {text}
-
-            {format_instructions}"""
+        prompt = ChatPromptTemplate.from_messages([
+            SystemMessage(content=system_prompt),
+            ("user", "Job Posting Text:\n{text}")
+        ])
+        return prompt | llm.with_structured_output(CombinedExtraction, method="function_calling")
+
+    def _create_batch_extraction_chain(self) -> RunnableSequence:
+        """Create the chain extracting several job postings in one call"""
+        system_prompt = (
+            "Extract comprehensive job information and all education requirements from each job posting "
+            "sent by the user.\n\n" + EXTRACTION_INSTRUCTIONS + "\n\n"
+            "Return one entry in \"postings\" per job posting, in the same order as the postings."
         )
-        return prompt | self.llm | self.education_parser
+        prompt = ChatPromptTemplate.from_messages([
+            SystemMessage(content=system_prompt),
+            ("user", "Return exactly {count} entries in \"postings\".\n\n{postings}")
+        ])
+        return prompt | self.llm.with_structured_output(CombinedExtractionBatch, method="function_calling")
 
     def _setup_db(self):
         """Setup the output database with improved schema"""
@@ -271,6 +769,9 @@ class AcademicDetailsProcessor:
         # Enable foreign keys
         conn.execute("PRAGMA foreign_keys = ON")
 
+        # Larger pages for new databases; existing ones keep theirs until VACUUMed
+        conn.execute("PRAGMA page_size = 8192")
+
         # Main jobs table with additional fields
         conn.execute("""
                      CREATE TABLE IF NOT EXISTS jobs_meta
@@ -318,10 +819,11 @@ class AcademicDetailsProcessor:
                      )
                      """)
 
-        # Add indexes for better performance
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_meta_job ON jobs_meta(job_id)")
+        # Add indexes for better performance (job_id is already the primary key)
+        conn.execute("DROP INDEX IF EXISTS idx_meta_job")
         conn.execute("CREATE INDEX IF NOT EXISTS idx_meta_company ON jobs_meta(company)")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_meta_industry ON jobs_meta(industry)")
+        conn.execute("DROP INDEX IF EXISTS idx_meta_industry")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_meta_industry_title ON jobs_meta(industry, title_clean)")
 
         # Job classification table
         conn.execute("""
@@ -573,51 +1075,101 @@ class AcademicDetailsProcessor:
                          )
                      """)
 
+        # Extractions keyed by posting text, reused for identical or near-identical postings
+        conn.execute("""
+                     CREATE TABLE IF NOT EXISTS extraction_cache
+                     (
+                         text_hash
+                         TEXT
+                         PRIMARY
+                         KEY,
+                         embedding
+                         BLOB,
+                         extraction
+                         TEXT
+                         NOT
+                         NULL,
+                         created_at
+                         TIMESTAMP
+                         DEFAULT
+                         CURRENT_TIMESTAMP
+                     )
+                     """)
+
         # Add indexes for performance
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_edu_job ON education_requirements(job_id)")
+        conn.execute("DROP INDEX IF EXISTS idx_edu_job")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_edu_job_level ON education_requirements(job_id, level)")
         conn.execute("CREATE INDEX IF NOT EXISTS idx_cert_job ON certifications(job_id)")
         conn.execute("CREATE INDEX IF NOT EXISTS idx_status ON processing_status(status)")
 
+        # Covering indexes for get_processing_statistics and export_career_insights
+        conn.execute("DROP INDEX IF EXISTS idx_edu_level")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_edu_level_field ON education_requirements(level, field, job_id)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_comp_salary ON compensation(salary_min, salary_max)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_loc_work ON location_work(remote, onsite, hybrid)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cert_name ON certifications(name, issuer, required)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_loc_office ON location_work(office_location)")
+
         conn.commit()
         conn.close()
         logger.info("Database schema setup completed")
 
+    def _connect_output_db(self) -> sqlite3.Connection:
+        """Open the connection all output database access goes through"""
+        conn = sqlite3.connect(self.output_db_path, isolation_level=None, cached_statements=256)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-65536")
+        conn.execute("PRAGMA mmap_size=268435456")
+        return conn
+
+    def _begin(self):
+        """Open the batch transaction if one is not already open"""
+        if not self._conn.in_transaction:
+            self._conn.execute("BEGIN")
+
+    def flush(self):
+        """Commit stored jobs that are still in the open batch transaction"""
+        if self._conn.in_transaction:
+            self._conn.execute("COMMIT")
+        self._uncommitted_jobs = 0
+
+    def close(self):
+        """Commit pending writes and close the output database"""
+        self.flush()
+        self._conn.close()
+
     def _preprocess_text(self, text: str) -> str:
         """Preprocess job posting text"""
         if not text:
             return ""
 
         # Normalize whitespace
-        text = WHITESPACE_RE.sub(" ", text)
+        text = " ".join(text.split())
 
-        # Normalize degree abbreviations
-        for regex, replacement in [
-            (BS_RE, "Bachelor of Science"),
-            (BA_RE, "Bachelor of Arts"),
-            (MS_RE, "Master of Science"),
-            (MA_RE, "Master of Arts"),
-            (PHD_RE, "Doctor of Philosophy")
-        ]:
-            text = regex.sub(replacement, text)
+        # Normalize degree abbreviations in a single pass
+        text = DEGREE_RE.sub(
+            lambda m: DEGREE_REPLACEMENTS[m.group(0).replace(".", "").upper()], text
+        )
 
-        return text.strip()
+        return text
 
     def _store_job_data(self, job_id: int, job_data: JobExtraction, education_data: EducationExtraction):
-        """Store extracted job data in database"""
-        conn = sqlite3.connect(self.output_db_path)
+        """Store extracted job data in database
 
-        try:
-            self.ai_client = LlmChat(api_key=os.environ.get('OPENAI_API_KEY'))
-            conn.execute("BEGIN TRANSACTION")
+        Each job is written under its own savepoint inside the batch
+        transaction, which is committed every batch_size jobs.
+        """
+        conn = self._conn
+        self._begin()
+        conn.execute("SAVEPOINT store_job")
 
+        try:
             # Store main job metadata
-            conn.execute("""
-                INSERT OR REPLACE INTO jobs_meta 
-                (job_id, full_link, title_clean, company, company_location, post_date, 
-                 industry, job_type, job_category, job_description, application_deadline, 
-                 additional_requirements, experience_required, company_size, processing_timestamp)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
+            conn.execute(UPSERT_JOBS_META_SQL, (
                 job_id, job_data.full_link, job_data.title_clean, job_data.company,
                 job_data.company_location, job_data.post_date, job_data.industry,
                 job_data.job_type, job_data.job_category, job_data.job_description,
@@ -626,288 +1178,1061 @@ class AcademicDetailsProcessor:
             ))
 
             # Store job classification
-            conn.execute("""
-                INSERT OR REPLACE INTO job_classification 
-                (job_id, category, level, function, department)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
+            conn.execute(UPSERT_JOB_CLASSIFICATION_SQL, (
                 job_id, job_data.job_classification.category,
                 job_data.job_classification.level, job_data.job_classification.function,
                 job_data.job_classification.department
             ))
 
             # Store location and work details
-            conn.execute("""
-                INSERT OR REPLACE INTO location_work 
-                (job_id, office_location, remote, onsite, hybrid, travel_required)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (
+            conn.execute(UPSERT_LOCATION_WORK_SQL, (
                 job_id, job_data.location_and_work.office_location,
                 job_data.location_and_work.remote, job_data.location_and_work.onsite,
                 job_data.location_and_work.hybrid, job_data.location_and_work.travel_required
             ))
 
             # Store skills taxonomy
-            conn.execute("""
-                INSERT OR REPLACE INTO skills_taxonomy 
-                (job_id, main_skill, technical_skills, soft_skills, tools_technologies, 
-                 programming_languages, frameworks)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
+            conn.execute(UPSERT_SKILLS_TAXONOMY_SQL, (
                 job_id, job_data.skills.main_skill,
-                json.dumps(job_data.skills.technical_skills),
-                json.dumps(job_data.skills.soft_skills),
-                json.dumps(job_data.skills.tools_technologies),
-                json.dumps(job_data.skills.programming_languages),
-                json.dumps(job_data.skills.frameworks)
+                orjson.dumps(job_data.skills.technical_skills).decode(),
+                orjson.dumps(job_data.skills.soft_skills).decode(),
+                orjson.dumps(job_data.skills.tools_technologies).decode(),
+                orjson.dumps(job_data.skills.programming_languages).decode(),
+                orjson.dumps(job_data.skills.frameworks).decode()
             ))
 
             # Clear and store certifications
             conn.execute("DELETE FROM certifications WHERE job_id = ?", (job_id,))
-            for cert in job_data.certifications:
-                conn.execute("""
-                             INSERT INTO certifications (job_id, name, issuer, year, required)
-                             VALUES (?, ?, ?, ?, ?)
-                             """, (job_id, cert.name, cert.issuer, cert.year, cert.required))
+            conn.executemany(INSERT_CERTIFICATION_SQL, [
+                                 (job_id, cert.name, cert.issuer, cert.year, cert.required)
+                                 for cert in job_data.certifications
+                             ])
 
             # Store career progression
-            conn.execute("""
-                INSERT OR REPLACE INTO career_progression 
-                (job_id, entry_level, mid_level, senior_level, growth_opportunities)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
+            conn.execute(UPSERT_CAREER_PROGRESSION_SQL, (
                 job_id, job_data.career_progression.entry_level,
                 job_data.career_progression.mid_level, job_data.career_progression.senior_level,
-                json.dumps(job_data.career_progression.growth_opportunities)
+                orjson.dumps(job_data.career_progression.growth_opportunities).decode()
             ))
 
             # Store compensation
-            conn.execute("""
-                INSERT OR REPLACE INTO compensation 
-                (job_id, salary_min, salary_max, currency, salary_type, benefits)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (
+            conn.execute(UPSERT_COMPENSATION_SQL, (
                 job_id, job_data.compensation.salary_min, job_data.compensation.salary_max,
                 job_data.compensation.currency, job_data.compensation.salary_type,
-                json.dumps(job_data.compensation.benefits)
+                orjson.dumps(job_data.compensation.benefits).decode()
             ))
 
             # Clear and store education requirements
             conn.execute("DELETE FROM education_requirements WHERE job_id = ?", (job_id,))
-            for req in education_data.requirements:
-                conn.execute("""
-                             INSERT INTO education_requirements
-                             (job_id, level, field, requirement_type, years_experience_substitute, confidence_score)
-                             VALUES (?, ?, ?, ?, ?, ?)
-                             """, (
-                                 job_id, req.level, req.field, req.requirement_type,
-                                 req.years_experience_substitute, req.confidence_score
-                             ))
+            conn.executemany(INSERT_EDUCATION_REQUIREMENT_SQL, [
+                                 (
+                                     job_id, req.level, req.field, req.requirement_type,
+                                     req.years_experience_substitute, req.confidence_score
+                                 )
+                                 for req in education_data.requirements
+                             ])
 
             # Update processing status
-            conn.execute("""
-                INSERT OR REPLACE INTO processing_status (job_id, status, last_attempt)
-                VALUES (?, 'completed', CURRENT_TIMESTAMP)
-            """, (job_id,))
+            conn.execute(MARK_COMPLETED_SQL, (job_id,))
 
-            conn.commit()
-            logger.info(f"Successfully stored data for job {job_id}")
+            conn.execute("RELEASE SAVEPOINT store_job")
+            logger.info("Successfully stored data for job %s", job_id)
 
         except Exception as e:
-            logger.error(f"Failed to initialize AI client: {e}")
+            conn.execute("ROLLBACK TO SAVEPOINT store_job")
+            conn.execute("RELEASE SAVEPOINT store_job")
+            logger.error("Failed to store data for job %s: %s", job_id, e)
 
-=======
-        
-    def _init_ai_client(self):
-        """Initialize AI client for content processing"""
+            # Update error status
+            try:
+                self._mark_error(job_id, str(e))
+            except:
+                pass
+
+            raise
+        finally:
+            self._uncommitted_jobs += 1
+            if self._uncommitted_jobs >= self.batch_size:
+                self.flush()
+
+    def _mark_error(self, job_id: int, message: str):
+        """Record a failed job so the next run picks it up again"""
+        self._begin()
+        self._conn.execute(MARK_ERROR_SQL, (job_id, message))
+
+    def _store_extraction(self, job_id: int, full_link: str, content: str,
+                          extraction: CombinedExtraction) -> tuple[JobExtraction, EducationExtraction]:
+        """Attach the job's own details to an extraction and store it in the database
+
+        Duplicate postings share one extraction object (through the cache,
+        singleflight and the batched call), so each job fills in a copy.
+        """
+        extraction = extraction.model_copy(deep=True)
+        job_data, education_data = extraction.job, extraction.education
+        job_data.full_link = full_link
+        job_data.raw_text_analyzed = content[:1000]  # Store first 1000 chars
+        job_data.processing_timestamp = datetime.now().isoformat()
+        education_data.raw_text_analyzed = content[:500]
+        self._store_job_data(job_id, job_data, education_data)
+        return job_data, education_data
+
+    async def _cached_extractions(self, texts: List[str]) -> tuple[List[Optional[CombinedExtraction]], List[tuple]]:
+        """Look up cached extractions for preprocessed posting texts
+
+        Identical postings are matched by SHA-256 of the text. The rest are
+        embedded and matched against cached postings whose cosine similarity
+        is at least cache_similarity.
+
+        Returns:
+            The cached extraction (or None) per text, and the (text_hash,
+            embedding) key to cache a fresh extraction under
+        """
+        text_hashes = [hashlib.sha256(text.encode("utf-8")).hexdigest() for text in texts]
+        exact = self._read_cached_extractions(text_hashes)
+        results = [exact.get(text_hash) for text_hash in text_hashes]
+        embeddings: List[Optional[np.ndarray]] = [None] * len(texts)
+
+        misses = [i for i, extraction in enumerate(results) if extraction is None]
+        if misses and self.embeddings is not None:
+            try:
+                vectors = await self.embeddings.aembed_documents([texts[i] for i in misses])
+            except Exception as e:
+                logger.warning("Failed to embed postings for the extraction cache: %s", e)
+                vectors = []
+
+            self._load_cache_index()
+            similar_hashes = {}
+            for i, vector in zip(misses, vectors):
+                vector = np.asarray(vector, dtype=np.float32)
+                vector /= np.linalg.norm(vector) or 1.0
+                embeddings[i] = vector
+                if self._cache_vectors is not None:
+                    similarities = self._cache_vectors @ vector
+                    best = int(similarities.argmax())
+                    if similarities[best] >= self.cache_similarity:
+                        similar_hashes[i] = self._cache_hashes[best]
+
+            if similar_hashes:
+                similar = self._read_cached_extractions(list(similar_hashes.values()))
+                for i, text_hash in similar_hashes.items():
+                    results[i] = similar.get(text_hash)
+                    # Remember the posting itself so the next lookup is an exact match
+                    if results[i] is not None:
+                        self._cache_extraction((text_hashes[i], embeddings[i]), results[i])
+
+        return results, list(zip(text_hashes, embeddings))
+
+    def _is_long_context(self, text: str) -> bool:
+        """Whether a preprocessed posting is routed to the long-context model"""
+        return self.long_context_chain is not None and len(text) > self.long_context_chars
+
+    def _chain_text(self, text: str) -> str:
+        """Cut a preprocessed posting down to max_chain_chars for the extraction prompt
+
+        The opening (title, company, location) is kept and the rest of the
+        window starts at the first requirements/qualifications heading, where
+        the education and skills details usually are.
+        """
+        limit = self.max_chain_chars
+        if not limit or len(text) <= limit:
+            return text
+
+        head = text[:limit // 4]
+        anchor = CHAIN_ANCHOR_RE.search(text, len(head))
+        if anchor is None:
+            return text[:limit]
+        return head + " ... " + text[anchor.start():anchor.start() + limit - len(head)]
+
+    def _read_cached_extractions(self, text_hashes: List[str]) -> Dict[str, CombinedExtraction]:
+        """Load cached extractions by text hash"""
+        placeholders = ", ".join("?" * len(text_hashes))
+        rows = self._conn.execute(
+            f"SELECT text_hash, extraction FROM extraction_cache WHERE text_hash IN ({placeholders})",
+            text_hashes
+        ).fetchall()
+
+        cached = {}
+        for text_hash, extraction in rows:
+            try:
+                # Rows are written by _cache_extraction from already validated models
+                cached[text_hash] = CombinedExtraction.from_trusted(orjson.loads(extraction))
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning("Discarding unreadable cached extraction %s: %s", text_hash, e)
+        return cached
+
+    def _load_cache_index(self):
+        """Load cached posting embeddings into memory for similarity lookups"""
+        if self._cache_hashes is not None:
+            return
+
+        rows = self._conn.execute(
+            "SELECT text_hash, embedding FROM extraction_cache WHERE embedding IS NOT NULL"
+        ).fetchall()
+
+        self._cache_hashes = [text_hash for text_hash, _ in rows]
+        if rows:
+            self._cache_vectors = np.vstack([np.frombuffer(embedding, dtype=np.float32) for _, embedding in rows])
+
+    def _cache_extraction(self, cache_key: tuple, extraction: CombinedExtraction):
+        """Store a fresh extraction in the extraction cache"""
+        text_hash, embedding = cache_key
+        self._begin()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO extraction_cache (text_hash, embedding, extraction) VALUES (?, ?, ?)",
+            (text_hash, embedding.tobytes() if embedding is not None else None, extraction.model_dump_json())
+        )
+
+        # Keep the in-memory index in step once it has been loaded
+        if embedding is not None and self._cache_hashes is not None:
+            self._cache_hashes.append(text_hash)
+            self._cache_vectors = (
+                embedding[np.newaxis, :] if self._cache_vectors is None
+                else np.vstack([self._cache_vectors, embedding])
+            )
+
+    def _empty_result(self, full_link: Optional[str], content: str) -> tuple[JobExtraction, EducationExtraction]:
+        """Empty extraction returned for jobs that could not be processed
+
+        Built with model_construct: the fields are our own, so the failure
+        path skips validation.
+        """
+        return (
+            JobExtraction.model_construct(full_link=full_link, raw_text_analyzed=content[:1000] if content else ""),
+            EducationExtraction.model_construct(requirements=[], raw_text_analyzed=content[:500] if content else "")
+        )
+
+    async def extract_and_store_async(self, job_id: int, full_link: str, content: str) -> tuple[
+        JobExtraction, EducationExtraction]:
+        """Extract job information and education requirements, then store in database"""
+        processed_content = self._preprocess_text(content)
+
+        if not processed_content:
+            logger.warning("Job %s: Empty content after preprocessing", job_id)
+            return self._empty_result(full_link, content)
+
+        (cached,), (cache_key,) = await self._cached_extractions([processed_content])
+
+        delay = RETRY_BASE_DELAY
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                if cached is not None:
+                    logger.info("Job %s: Reusing cached extraction", job_id)
+                    extraction = cached
+                else:
+                    # Extract job information and education requirements in one call
+                    # Long postings go whole to the long-context model, the rest are trimmed
+                    if self._is_long_context(processed_content):
+                        chain, text = self.long_context_chain, processed_content
+                    else:
+                        chain, text = self.extraction_chain, self._chain_text(processed_content)
+
+                    async def request():
+                        fresh = await chain.ainvoke({"text": text})
+                        if fresh is None:
+                            raise OutputParserException("model returned no extraction function call")
+                        self._cache_extraction(cache_key, fresh)
+                        return fresh
+
+                    # An identical posting already being extracted is awaited, not requested again
+                    extraction = await _singleflight(self._inflight, cache_key[0], request)
+
+            except Exception as e:
+                logger.error("Job %s: Attempt %s failed: %s", job_id, attempt, e)
+                if not isinstance(e, RETRYABLE_ERRORS):
+                    logger.error("Job %s: %s is not retryable", job_id, type(e).__name__)
+                elif attempt >= self.max_retries:
+                    logger.error("Job %s: Max retries exceeded", job_id)
+                else:
+                    # Jittered so parallel jobs do not retry against the provider in lockstep
+                    delay = _next_backoff(delay)
+                    await asyncio.sleep(delay)
+                    continue
+
+                self._mark_error(job_id, str(e))
+                return self._empty_result(full_link, content)
+
+            try:
+                job_data, education_data = self._store_extraction(job_id, full_link, content, extraction)
+            except Exception as e:
+                # _store_job_data has already recorded the error status
+                logger.error("Job %s: Failed to store extraction: %s", job_id, e)
+                return self._empty_result(full_link, content)
+
+            logger.info("Job %s: Successfully processed with %s education requirements",
+                        job_id, len(education_data.requirements))
+            return job_data, education_data
+
+    async def extract_and_store_many_async(self, jobs: List[tuple]) -> List[tuple[JobExtraction, EducationExtraction]]:
+        """Extract and store several (job_id, full_link, content) jobs with one LLM call
+
+        Falls back to one call per job when the response cannot be matched
+        back to the postings it was asked about.
+        """
+        if len(jobs) == 1:
+            return [await self.extract_and_store_async(*jobs[0])]
+
+        results: List[Optional[tuple]] = [None] * len(jobs)
+        pending = []
+        for i, (job_id, full_link, content) in enumerate(jobs):
+            processed_content = self._preprocess_text(content)
+            if processed_content:
+                pending.append((i, processed_content))
+            else:
+                logger.warning("Job %s: Empty content after preprocessing", job_id)
+                results[i] = self._empty_result(full_link, content)
+
+        # Postings seen before are served from the extraction cache
+        misses = []
+        if pending:
+            cached, cache_keys = await self._cached_extractions([text for _, text in pending])
+            for (i, processed_content), extraction, cache_key in zip(pending, cached, cache_keys):
+                if extraction is None:
+                    # Long postings go to the long-context model one at a time below
+                    if not self._is_long_context(processed_content):
+                        misses.append((i, processed_content, cache_key))
+                    continue
+                try:
+                    results[i] = self._store_extraction(*jobs[i], extraction)
+                except Exception as e:
+                    logger.error("Job %s: Failed to store cached extraction: %s", jobs[i][0], e)
+
+        # Postings already being extracted, or repeated in this group, are left
+        # to the per-job path below, which waits for or reuses that extraction
+        unique_misses = []
+        for miss in misses:
+            text_hash = miss[2][0]
+            if text_hash not in self._inflight:
+                unique_misses.append(miss)
+                _start_flight(self._inflight, text_hash)
+        misses = unique_misses
+
+        if misses:
+            try:
+                postings = "\n\n".join(
+                    f"---POSTING {n}---\n{self._chain_text(processed_content)}"
+                    for n, (_, processed_content, _) in enumerate(misses, 1)
+                )
+                extraction = await self.batch_extraction_chain.ainvoke({"count": len(misses), "postings": postings})
+                if extraction is None:
+                    raise OutputParserException("model returned no extraction function call")
+                if len(extraction.postings) != len(misses):
+                    raise ValueError(f"expected {len(misses)} postings, got {len(extraction.postings)}")
+
+                # Cache and share every extraction before storing any, so a failed
+                # store does not cost the other postings another call
+                for (_, _, cache_key), posting in zip(misses, extraction.postings):
+                    self._cache_extraction(cache_key, posting)
+                    self._inflight[cache_key[0]].set_result(posting)
+                logger.info("Successfully extracted %s jobs in one call", len(misses))
+
+                for (i, _, _), posting in zip(misses, extraction.postings):
+                    try:
+                        results[i] = self._store_extraction(*jobs[i], posting)
+                    except Exception as e:
+                        logger.error("Job %s: Failed to store extraction: %s", jobs[i][0], e)
+
+            except Exception as e:
+                logger.warning("Batched extraction failed, processing jobs individually: %s", e)
+            finally:
+                for _, _, (text_hash, _) in misses:
+                    future = self._inflight.pop(text_hash)
+                    if not future.done():
+                        future.set_exception(BatchExtractionFailed(text_hash))
+
+        # Jobs the batched call did not cover are processed one at a time
+        retry = [i for i, result in enumerate(results) if result is None]
+        for i, result in zip(retry, await asyncio.gather(*[self.extract_and_store_async(*jobs[i]) for i in retry])):
+            results[i] = result
+        return results
+
+    def extract_and_store(self, job_id: int, full_link: str, content: str) -> tuple[JobExtraction, EducationExtraction]:
+        """Extract job information and education requirements, then store in database"""
         try:
-            self.ai_client = LlmChat(api_key=os.environ.get('OPENAI_API_KEY'))
+            return asyncio.run(self.extract_and_store_async(job_id, full_link, content))
+        finally:
+            self.flush()
+
+    def iter_unprocessed_jobs(self, chunk_size: int = 500) -> Iterator[tuple]:
+        """Yield jobs that haven't been processed yet or failed processing, chunk_size rows per query
+
+        Pages by job id rather than OFFSET, so each query starts at an index
+        seek and jobs stored while iterating are not skipped or seen twice.
+        """
+        # processing_status lives in the output database
+        query = """
+                SELECT jd.id, jd.full_link, jd.content
+                FROM jobs_data jd
+                         LEFT JOIN processed.processing_status ps ON jd.id = ps.job_id
+                WHERE jd.id > ?
+                  AND (ps.job_id IS NULL
+                   OR ps.status = 'error'
+                   OR (ps.status = 'pending' AND ps.retry_count < ?))
+                ORDER BY jd.id
+                LIMIT ?
+                """
+
+        last_id = 0
+        while True:
+            conn = sqlite3.connect(_readonly_uri(self.input_db_path), uri=True)
+            try:
+                conn.execute("ATTACH DATABASE ? AS processed", (_readonly_uri(self.output_db_path),))
+                rows = conn.execute(query, (last_id, self.max_retries, chunk_size)).fetchall()
+            except sqlite3.Error as e:
+                logger.error("Error querying unprocessed jobs: %s", e)
+                return
+            finally:
+                conn.close()
+
+            yield from rows
+            if len(rows) < chunk_size:
+                return
+            last_id = rows[-1][0]
+
+    def get_unprocessed_jobs(self) -> List[tuple]:
+        """Get jobs that haven't been processed yet or failed processing"""
+        rows = list(self.iter_unprocessed_jobs())
+        logger.info("Found %s jobs to process", len(rows))
+        return rows
+
+    async def _extract_group_async(self, jobs: List[tuple]) -> List[tuple[JobExtraction, EducationExtraction]]:
+        """Extract and store a group of jobs, returning empty results if the group fails"""
+        try:
+            return await self.extract_and_store_many_async(jobs)
         except Exception as e:
-            logger.error(f"Failed to initialize AI client: {e}")
-            
->>>>>>> update/main
-    async def __aenter__(self):
-        """Async context manager entry"""
-        connector = aiohttp.TCPConnector(limit=10, limit_per_host=3)
-        timeout = aiohttp.ClientTimeout(total=60)
-        self.session = aiohttp.ClientSession(
-            connector=connector,
-            timeout=timeout,
-            headers={
-                'User-Agent': 'NextStep Job Processor 1.0 (+https://nextstep.co.ke)'
-            }
-        )
-        return self
-        
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Async context manager exit"""
-        if self.session:
-            await self.session.close()
-            
-    async def process_job(self, job_record: Dict) -> Dict:
+            results = []
+            for job_id, full_link, content in jobs:
+                logger.error("Failed to process job %s: %s", job_id, e)
+                results.append(self._empty_result(full_link, content))
+            return results
+
+    async def batch_extract_async(self, max_concurrent: Optional[int] = None) -> List[
+        tuple[JobExtraction, EducationExtraction]]:
+        """Process unprocessed jobs with up to max_concurrent (default batch_size) LLM calls in flight
+
+        Jobs are read from the input database as calls free up, so only the
+        postings in flight are held in memory.
         """
-        Process a single job record and extract structured information
-        
+        # Limit in-flight LLM calls to respect the rate limit
+        semaphore = asyncio.Semaphore(max_concurrent or self.batch_size)
+        tasks = []
+        job_count = 0
+
+        # Each call carries postings_per_call postings
+        job_iter = self.iter_unprocessed_jobs()
+        while jobs := list(islice(job_iter, self.postings_per_call)):
+            await semaphore.acquire()
+            task = asyncio.create_task(self._extract_group_async(jobs))
+            task.add_done_callback(lambda _: semaphore.release())
+            tasks.append(task)
+            job_count += len(jobs)
+
+        if not tasks:
+            logger.info("No unprocessed jobs found")
+            return []
+
+        logger.info("Processing %s jobs in %s calls, %s at a time",
+                    job_count, len(tasks), max_concurrent or self.batch_size)
+        processed = [result for results in await asyncio.gather(*tasks) for result in results]
+
+        self.flush()
+        logger.info("Completed processing %s jobs", len(processed))
+        return processed
+
+    def batch_extract(self) -> List[tuple[JobExtraction, EducationExtraction]]:
+        """Process all unprocessed jobs concurrently"""
+        return asyncio.run(self.batch_extract_async())
+
+    def get_processing_statistics(self) -> Dict[str, Any]:
+        """Get statistics about the processing pipeline"""
+        conn = self._conn
+
+        try:
+            stats = {}
+
+            # Scalar totals in one statement, each answered from an index
+            (total_processed, avg_min, avg_max, min_min, max_max, count_with_salary,
+             remote_jobs, onsite_jobs, hybrid_jobs, total_work) = conn.execute("""
+                SELECT
+                    (SELECT COUNT(*) FROM jobs_meta),
+                    salary.avg_min, salary.avg_max, salary.min_min, salary.max_max, salary.count_with_salary,
+                    work.remote_jobs, work.onsite_jobs, work.hybrid_jobs, work.total_jobs
+                FROM (
+                    SELECT AVG(salary_min) AS avg_min, AVG(salary_max) AS avg_max,
+                           MIN(salary_min) AS min_min, MAX(salary_max) AS max_max,
+                           COUNT(*) AS count_with_salary
+                    FROM compensation
+                    WHERE salary_min IS NOT NULL OR salary_max IS NOT NULL
+                ) AS salary, (
+                    SELECT SUM(CASE WHEN remote = 1 THEN 1 ELSE 0 END) AS remote_jobs,
+                           SUM(CASE WHEN onsite = 1 THEN 1 ELSE 0 END) AS onsite_jobs,
+                           SUM(CASE WHEN hybrid = 1 THEN 1 ELSE 0 END) AS hybrid_jobs,
+                           COUNT(*) AS total_jobs
+                    FROM location_work
+                ) AS work
+            """).fetchone()
+
+            stats['total_processed'] = total_processed
+
+            # Processing status breakdown
+            stats['status_breakdown'] = dict(conn.execute(
+                "SELECT status, COUNT(*) FROM processing_status GROUP BY status"
+            ).fetchall())
+
+            # Top industries
+            stats['top_industries'] = dict(conn.execute("""
+                SELECT industry, COUNT(*) AS count
+                FROM jobs_meta
+                WHERE industry IS NOT NULL
+                GROUP BY industry
+                ORDER BY count DESC
+                LIMIT 10
+            """).fetchall())
+
+            # Education level distribution
+            stats['education_levels'] = dict(conn.execute("""
+                SELECT level, COUNT(*) AS count
+                FROM education_requirements
+                GROUP BY level
+                ORDER BY count DESC
+            """).fetchall())
+
+            # Salary statistics
+            if count_with_salary:
+                stats['salary_statistics'] = {
+                    'average_min': round(avg_min, 2) if avg_min else None,
+                    'average_max': round(avg_max, 2) if avg_max else None,
+                    'minimum_salary': min_min,
+                    'maximum_salary': max_max,
+                    'jobs_with_salary': count_with_salary
+                }
+
+            # Remote work statistics
+            stats['work_arrangement'] = {
+                'remote': remote_jobs,
+                'onsite': onsite_jobs,
+                'hybrid': hybrid_jobs,
+                'total': total_work
+            }
+
+            return stats
+
+        except sqlite3.Error as e:
+            logger.error("Error getting statistics: %s", e)
+            return {}
+
+    def export_career_insights(self, output_file: str = "career_insights.json", pretty: bool = False) -> bool:
+        """Export career insights for the advising tool
+
+        Every section is read inside one transaction, so the report reflects
+        a single snapshot of the database. Sections are written as they are
+        built, so only one is held in memory at a time.
+
         Args:
-            job_record: Basic job data with title and link
-            
-        Returns:
-            Processed job data with extracted information
+            pretty: Indent the JSON for reading; compact output is smaller
+                and faster to write
         """
+        conn = self._conn
+        self.flush()
+        partial_file = f"{output_file}.partial"
+
+        # Refresh planner statistics for tables that changed enough to need it
+        conn.execute("PRAGMA optimize")
+
         try:
-            logger.info(f"Processing job: {job_record.get('title', 'Unknown')}")
-            
-            # Fetch full job content
-            job_content = await self._fetch_job_content(job_record['link'])
-            if not job_content:
-                logger.warning(f"Failed to fetch content for {job_record['link']}")
-                return self._create_failed_record(job_record, "Failed to fetch content")
-            
-            # Extract structured information
-            extracted_data = await self._extract_job_information(job_content, job_record)
-            
-            # Enhance with AI analysis
-            ai_enhanced_data = await self._enhance_with_ai(extracted_data, job_content)
-            
-            # Create final processed record
-            processed_record = self._create_processed_record(job_record, extracted_data, ai_enhanced_data)
-            
-            logger.info(f"Successfully processed job: {processed_record['title']}")
-            return processed_record
-            
+            conn.execute("BEGIN")
+
+            with open(partial_file, 'wb') as f:
+                f.write(b'{')
+                for n, (name, section) in enumerate(self._career_insight_sections(conn)):
+                    if pretty:
+                        # Indent each section one level to nest it under the top-level object
+                        f.write(b',\n  ' if n else b'\n  ')
+                        f.write(orjson.dumps(name) + b': ')
+                        f.write(orjson.dumps(section, option=orjson.OPT_INDENT_2).replace(b'\n', b'\n  '))
+                    else:
+                        f.write(b',' if n else b'')
+                        f.write(orjson.dumps(name) + b':' + orjson.dumps(section))
+                f.write(b'\n}' if pretty else b'}')
+
+            # Replace the previous report only once this one is complete
+            os.replace(partial_file, output_file)
+
+            logger.info("Career insights exported to %s", output_file)
+            return True
+
         except Exception as e:
-            logger.error(f"Error processing job {job_record.get('link', 'Unknown')}: {e}")
-            return self._create_failed_record(job_record, str(e))
-            
-    async def _fetch_job_content(self, job_url: str) -> Optional[str]:
-        """Fetch full job posting content"""
+            logger.error("Error exporting career insights: %s", e)
+            if os.path.exists(partial_file):
+                os.remove(partial_file)
+            return False
+        finally:
+            if conn.in_transaction:
+                conn.execute("COMMIT")
+
+    def _career_insight_sections(self, conn: sqlite3.Connection) -> Iterator[tuple[str, Dict]]:
+        """Yield (name, section) pairs of the career insights report, one query at a time
+
+        Rows are read from each cursor as they are consumed rather than
+        fetched into a list first.
+        """
+        # Job titles by industry
+        job_titles_by_industry = {}
+        titles_by_industry = conn.execute("""
+                                          SELECT jm.industry, jm.title_clean, COUNT(*) as frequency
+                                          FROM jobs_meta jm
+                                          WHERE jm.industry IS NOT NULL
+                                            AND jm.title_clean IS NOT NULL
+                                          GROUP BY jm.industry, jm.title_clean
+                                          ORDER BY jm.industry, frequency DESC
+                                          """)
+
+        for industry, title, freq in titles_by_industry:
+            if industry not in job_titles_by_industry:
+                job_titles_by_industry[industry] = []
+            job_titles_by_industry[industry].append({
+                'title': title,
+                'frequency': freq
+            })
+        yield 'job_titles_by_industry', job_titles_by_industry
+
+        # Skills by industry
+        skills_by_industry = {}
+        skills_query = conn.execute("""
+                                    SELECT jm.industry, st.technical_skills, st.programming_languages, st.frameworks
+                                    FROM jobs_meta jm
+                                             JOIN skills_taxonomy st ON jm.job_id = st.job_id
+                                    WHERE jm.industry IS NOT NULL
+                                    """)
+
+        for industry, tech_skills, prog_langs, frameworks in skills_query:
+            if industry not in skills_by_industry:
+                skills_by_industry[industry] = {
+                    'technical_skills': [],
+                    'programming_languages': [],
+                    'frameworks': []
+                }
+
+            # Parse JSON skills
+            try:
+                if tech_skills:
+                    skills_by_industry[industry]['technical_skills'].extend(orjson.loads(tech_skills))
+                if prog_langs:
+                    skills_by_industry[industry]['programming_languages'].extend(
+                        orjson.loads(prog_langs))
+                if frameworks:
+                    skills_by_industry[industry]['frameworks'].extend(orjson.loads(frameworks))
+            except orjson.JSONDecodeError:
+                continue
+        yield 'skills_by_industry', skills_by_industry
+
+        # Education pathways
+        education_pathways = {}
+        edu_pathways = conn.execute("""
+                                    SELECT er.level, er.field, jm.industry, COUNT(*) as frequency
+                                    FROM education_requirements er
+                                             JOIN jobs_meta jm ON er.job_id = jm.job_id
+                                    WHERE er.field IS NOT NULL
+                                      AND jm.industry IS NOT NULL
+                                    GROUP BY er.level, er.field, jm.industry
+                                    ORDER BY frequency DESC
+                                    """)
+
+        for level, field, industry, freq in edu_pathways:
+            pathway_key = f"{level}_{field}"
+            if pathway_key not in education_pathways:
+                education_pathways[pathway_key] = {
+                    'education_level': level,
+                    'field_of_study': field,
+                    'industries': []
+                }
+            education_pathways[pathway_key]['industries'].append({
+                'industry': industry,
+                'job_count': freq
+            })
+        yield 'education_pathways', education_pathways
+
+        # Salary ranges by level
+        salary_ranges_by_level = {}
+        salary_by_level = conn.execute("""
+                                       SELECT jc.level,
+                                              AVG(c.salary_min) as avg_min,
+                                              AVG(c.salary_max) as avg_max,
+                                              COUNT(*) as count
+                                       FROM job_classification jc
+                                           JOIN compensation c
+                                       ON jc.job_id = c.job_id
+                                       WHERE jc.level IS NOT NULL
+                                         AND (c.salary_min IS NOT NULL
+                                          OR c.salary_max IS NOT NULL)
+                                       GROUP BY jc.level
+                                       """)
+
+        for level, avg_min, avg_max, count in salary_by_level:
+            salary_ranges_by_level[level] = {
+                'average_min_salary': round(avg_min, 2) if avg_min else None,
+                'average_max_salary': round(avg_max, 2) if avg_max else None,
+                'sample_size': count
+            }
+        yield 'salary_ranges_by_level', salary_ranges_by_level
+
+        # Career progression paths
+        career_progression_paths = {}
+        progression_data = conn.execute("""
+                                        SELECT entry_level, mid_level, senior_level, COUNT(*) as frequency
+                                        FROM career_progression
+                                        WHERE entry_level IS NOT NULL
+                                           OR mid_level IS NOT NULL
+                                           OR senior_level IS NOT NULL
+                                        GROUP BY entry_level, mid_level, senior_level
+                                        ORDER BY frequency DESC
+                                        """)
+
+        for entry, mid, senior, freq in progression_data:
+            if any([entry, mid, senior]):
+                path_key = f"{entry or 'Unknown'}_to_{senior or 'Unknown'}"
+                career_progression_paths[path_key] = {
+                    'entry_level': entry,
+                    'mid_level': mid,
+                    'senior_level': senior,
+                    'frequency': freq
+                }
+        yield 'career_progression_paths', career_progression_paths
+
+        # In-demand skills (most frequently mentioned), counted by SQLite's JSON1;
+        # a malformed list is skipped rather than failing the whole report
+        yield 'in_demand_skills', dict(conn.execute("""
+                                   SELECT skill, COUNT(*) as frequency
+                                   FROM (SELECT s.value AS skill
+                                         FROM skills_taxonomy st, json_each(st.technical_skills) s
+                                         WHERE json_valid(st.technical_skills)
+                                         UNION ALL
+                                         SELECT s.value
+                                         FROM skills_taxonomy st, json_each(st.programming_languages) s
+                                         WHERE json_valid(st.programming_languages)
+                                         UNION ALL
+                                         SELECT s.value
+                                         FROM skills_taxonomy st, json_each(st.frameworks) s
+                                         WHERE json_valid(st.frameworks))
+                                   GROUP BY skill
+                                   ORDER BY frequency DESC, skill LIMIT 50
+                                   """))
+
+        # Certification recommendations
+        certification_recommendations = {}
+        cert_data = conn.execute("""
+                                 SELECT c.name,
+                                        c.issuer,
+                                        COUNT(*)                                        as frequency,
+                                        AVG(CASE WHEN c.required = 1 THEN 1 ELSE 0 END) as required_ratio
+                                 FROM certifications c
+                                 WHERE c.name IS NOT NULL
+                                 GROUP BY c.name, c.issuer
+                                 ORDER BY frequency DESC LIMIT 20
+                                 """)
+
+        for name, issuer, freq, req_ratio in cert_data:
+            certification_recommendations[name] = {
+                'issuer': issuer,
+                'frequency': freq,
+                'often_required': req_ratio > 0.5
+            }
+        yield 'certification_recommendations', certification_recommendations
+
+        # Location opportunities
+        location_opportunities = {}
+        location_data = conn.execute("""
+                                     SELECT lw.office_location,
+                                            COUNT(*)          as job_count,
+                                            AVG(c.salary_min) as avg_salary_min,
+                                            AVG(c.salary_max) as avg_salary_max
+                                     FROM location_work lw
+                                              LEFT JOIN compensation c ON lw.job_id = c.job_id
+                                     WHERE lw.office_location IS NOT NULL
+                                     GROUP BY lw.office_location
+                                     ORDER BY job_count DESC LIMIT 30
+                                     """)
+
+        for location, job_count, avg_min, avg_max in location_data:
+            location_opportunities[location] = {
+                'job_count': job_count,
+                'average_salary_min': round(avg_min, 2) if avg_min else None,
+                'average_salary_max': round(avg_max, 2) if avg_max else None
+            }
+        yield 'location_opportunities', location_opportunities
+
+        # Add metadata
+        yield 'metadata', {
+            'generated_at': datetime.now().isoformat(),
+            'total_jobs_analyzed': conn.execute("SELECT COUNT(*) FROM jobs_meta").fetchone()[0],
+            'data_sources': ['job_postings'],
+            'version': '1.0'
+        }
+
+    def cleanup_failed_jobs(self) -> int:
+        """Clean up jobs that have repeatedly failed processing"""
+        conn = self._conn
+        self.flush()
+
         try:
-            async with self.session.get(job_url) as response:
-                if response.status == 200:
-                    return await response.text()
-                else:
-                    logger.warning(f"HTTP {response.status} for {job_url}")
-                    return None
-        except Exception as e:
-            logger.error(f"Error fetching {job_url}: {e}")
-            return None
-            
-    async def _extract_job_information(self, html_content: str, job_record: Dict) -> Dict:
+            # Take the write lock up front rather than upgrading mid-statement
+            conn.execute("BEGIN IMMEDIATE")
+
+            # Delete jobs that have failed more than max_retries times
+            cursor = conn.execute("""
+                                  DELETE
+                                  FROM processing_status
+                                  WHERE status = 'error'
+                                    AND retry_count > ?
+                                  """, (self.max_retries,))
+
+            deleted_count = cursor.rowcount
+            conn.execute("COMMIT")
+
+            if deleted_count > 0:
+                logger.info("Cleaned up %s failed job records", deleted_count)
+
+            return deleted_count
+
+        except sqlite3.Error as e:
+            logger.error("Error during cleanup: %s", e)
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            return 0
+
+    def validate_database_integrity(self) -> Dict[str, Any]:
+        """Validate the integrity of the processed data"""
+        conn = self._conn
+
+        try:
+            validation_results = {
+                'issues': [],
+                'warnings': [],
+                'summary': {}
+            }
+
+            # Check for orphaned records
+            for child_table, orphan_sql in ORPHAN_CHECK_SQL:
+                orphaned = conn.execute(orphan_sql).fetchone()[0]
+
+                if orphaned > 0:
+                    validation_results['issues'].append(f"Found {orphaned} orphaned records in {child_table}")
+
+            # Check for missing critical data
+            missing_titles = \
+            conn.execute("SELECT COUNT(*) FROM jobs_meta WHERE title_clean IS NULL OR title_clean = ''").fetchone()[0]
+            if missing_titles > 0:
+                validation_results['warnings'].append(f"{missing_titles} jobs missing clean titles")
+
+            missing_companies = \
+            conn.execute("SELECT COUNT(*) FROM jobs_meta WHERE company IS NULL OR company = ''").fetchone()[0]
+            if missing_companies > 0:
+                validation_results['warnings'].append(f"{missing_companies} jobs missing company information")
+
+            # Check data quality scores
+            low_confidence_edu = \
+            conn.execute("SELECT COUNT(*) FROM education_requirements WHERE confidence_score < 0.5").fetchone()[0]
+            if low_confidence_edu > 0:
+                validation_results['warnings'].append(
+                    f"{low_confidence_edu} education requirements with low confidence scores")
+
+            # Summary statistics
+            validation_results['summary'] = {
+                'total_jobs': conn.execute("SELECT COUNT(*) FROM jobs_meta").fetchone()[0],
+                'total_education_requirements': conn.execute("SELECT COUNT(*) FROM education_requirements").fetchone()[
+                    0],
+                'total_certifications': conn.execute("SELECT COUNT(*) FROM certifications").fetchone()[0],
+                'jobs_with_salary_info': conn.execute(
+                    "SELECT COUNT(*) FROM compensation WHERE salary_min IS NOT NULL OR salary_max IS NOT NULL").fetchone()[
+                    0]
+            }
+
+            return validation_results
+
+        except sqlite3.Error as e:
+            logger.error("Error during validation: %s", e)
+            return {'error': str(e)}
+
+
+# Maximum concurrent fetches against a single job site
+HOST_CONCURRENCY = 8
+
+# Backoff applied to a host that throttles us without a usable Retry-After
+DEFAULT_RETRY_AFTER = 5.0
+MAX_RETRY_AFTER = 60.0
+
+# Job pages are read up to this many bytes; extraction only keeps a few KB
+MAX_CONTENT_BYTES = 512_000
+
+# On-disk caches of fetched pages and AI enhancements, so links seen on a
+# previous run are revalidated instead of re-fetched and re-analyzed
+CACHE_DIR = os.getenv("JOB_CACHE_DIR", ".cache")
+CACHE_EXPIRE = 30 * 24 * 3600
+
+# Bump when the enhancement prompt changes so cached AI results are dropped
+AI_PROMPT_VERSION = "2"
+
+# OpenAI Batch API settings for offline (realtime=False) enhancement runs
+OFFLINE_AI_MODEL = os.getenv("OFFLINE_AI_MODEL", "gpt-4o-mini")
+OFFLINE_POLL_INTERVAL = 60.0
+
+# HTTP session shared by every JobProcessor on the running event loop
+_shared_session: Optional[aiohttp.ClientSession] = None
+_shared_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def _get_shared_session() -> aiohttp.ClientSession:
+    """Return the shared HTTP session, creating it on first use
+    
+    Reusing one session across process_job_batch calls keeps the DNS cache
+    and keep-alive connections warm instead of re-handshaking every batch.
+    """
+    global _shared_session, _shared_session_loop
+    loop = asyncio.get_running_loop()
+    if _shared_session is None or _shared_session.closed or _shared_session_loop is not loop:
+        if _shared_session is not None and not _shared_session.closed:
+            # Left over from an earlier (normally finished) event loop; release it before replacing it
+            await _shared_session.close()
+        connector = aiohttp.TCPConnector(
+            limit=200, limit_per_host=20, use_dns_cache=True, ttl_dns_cache=300, keepalive_timeout=60
+        )
+        timeout = aiohttp.ClientTimeout(total=60, sock_connect=5, sock_read=30)
+        _shared_session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            headers={
+                'User-Agent': 'NextStep Job Processor 1.0 (+https://nextstep.co.ke)'
+            }
+        )
+        _shared_session_loop = loop
+    return _shared_session
+
+
+async def close_shared_session():
+    """Close the shared HTTP session, e.g. on application shutdown"""
+    global _shared_session, _shared_session_loop
+    if _shared_session and not _shared_session.closed:
+        await _shared_session.close()
+    _shared_session = None
+    _shared_session_loop = None
+
+
+class JobExtractor:
+    """Stateless HTML extraction for job postings
+    
+    Kept apart from JobProcessor so it can run in worker processes without
+    an HTTP session, AI client or caches.
+    """
+    
+    def extract(self, html_content: bytes, title: str, encoding: Optional[str] = None) -> Dict:
         """
         Extract structured information from job posting HTML
+
+        The raw bytes are decoded by lxml as it parses: with the HTTP
+        charset if the server sent one, otherwise from the page's meta tag,
+        otherwise as UTF-8 (libxml2 would assume Latin-1).
         """
-        soup = BeautifulSoup(html_content, 'html.parser')
+        if not encoding and b'charset' not in html_content[:1024].lower():
+            encoding = 'utf-8'
+        try:
+            parser = lxml.html.HTMLParser(encoding=encoding) if encoding else None
+        except LookupError:
+            parser = lxml.html.HTMLParser(encoding='utf-8')
+        tree = lxml.html.document_fromstring(html_content, parser=parser)
         
         # Remove script and style elements
-        for script in soup(["script", "style"]):
-            script.decompose()
+        etree.strip_elements(tree, 'script', 'style', 'noscript', with_tail=False)
             
         # Get clean text
-        text_content = soup.get_text(separator=' ', strip=True)
+        text_content = _node_text(tree, ' ')
+        text_lower = text_content.lower()
+        
+        # Match every extractor keyword and structured field in a single pass each
+        keyword_hits = self._scan_keywords(text_lower)
+        fields = _collect_fields(tree)
         
         # Initialize extracted data
         extracted = {
-            'title': job_record.get('title', ''),
-            'company': self._extract_company(soup, text_content),
-            'location': self._extract_location(soup, text_content),
-            'job_type': self._extract_job_type(text_content),
-            'experience_level': self._extract_experience_level(text_content),
-            'salary': self._extract_salary(soup, text_content),
-            'description': self._extract_description(soup),
+            'title': title,
+            'company': self._extract_company(fields.get('company'), text_content),
+            'location': self._extract_location(fields.get('location'), keyword_hits),
+            'job_type': self._extract_job_type(keyword_hits),
+            'experience_level': self._extract_experience_level(text_lower),
+            'salary': self._extract_salary(fields.get('salary'), text_content),
+            'description': self._extract_description(fields.get('description'), tree),
             'requirements': self._extract_requirements(text_content),
-            'skills': self._extract_skills(text_content),
-            'benefits': self._extract_benefits(text_content),
-            'deadline': self._extract_deadline(soup, text_content),
-            'education': self._extract_education(text_content),
-            'industry': self._extract_industry(text_content),
+            'skills': self._extract_skills(text_content, keyword_hits),
+            'benefits': self._extract_benefits(keyword_hits),
+            'deadline': self._extract_deadline(fields.get('deadline'), text_content),
+            'education': self._extract_education(keyword_hits),
+            'industry': self._extract_industry(keyword_hits),
             'full_text': text_content[:5000]  # Limit text length
         }
         
+        # Summarize the posting for the AI: the description block if the page
+        # marks one, otherwise the page text without navigation and footers
+        description = fields.get('description')
+        if description is None:
+            etree.strip_elements(tree, *BOILERPLATE_TAGS, with_tail=False)
+            description = tree.find('.//main')
+            if description is None:
+                description = tree.find('body')
+        summary = _node_text(description, ' ', limit=AI_CONTENT_CHARS) if description is not None else ''
+        extracted['content_summary'] = (summary or text_content)[:AI_CONTENT_CHARS]
+        
         return extracted
         
-    def _extract_company(self, soup: BeautifulSoup, text: str) -> str:
-        """Extract company name"""
-        # Try structured selectors first
-        company_selectors = [
-            '.company-name', '.company', '[data-testid="company-name"]',
-            '.employer-name', '.job-company', 'span.companyName'
-        ]
+    def _scan_keywords(self, text_lower: str) -> Dict[str, set]:
+        """Collect keyword tags per extractor category in one automaton pass"""
+        hits = {
+            category: set()
+            for category in ('job_type', 'benefits', 'education', 'industry', 'location', 'soft_skills')
+        }
+        for _, tags in KEYWORD_AUTOMATON.iter(text_lower):
+            for category, tag in tags:
+                hits[category].add(tag)
+        return hits
         
-        for selector in company_selectors:
-            elem = soup.select_one(selector)
-            if elem:
-                return elem.get_text(strip=True)
+    def _extract_company(self, elem: Optional[etree._Element], text: str) -> str:
+        """Extract company name"""
+        # Prefer the element matched by the structured selectors
+        if elem is not None:
+            return _node_text(elem)
                 
         # Fallback to text pattern matching
-        company_patterns = [
-            r'Company:\s*([^\n]+)',
-            r'Employer:\s*([^\n]+)',
-            r'Organization:\s*([^\n]+)'
-        ]
-        
-        for pattern in company_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in COMPANY_PATTERNS:
+            match = pattern.search(text)
             if match:
                 return match.group(1).strip()
                 
         return "Unknown"
         
-    def _extract_location(self, soup: BeautifulSoup, text: str) -> str:
+    def _extract_location(self, elem: Optional[etree._Element], keyword_hits: Dict[str, set]) -> str:
         """Extract job location"""
-        # Try structured selectors
-        location_selectors = [
-            '.location', '.job-location', '[data-testid="job-location"]',
-            '.workplace-location', '.job-address'
-        ]
-        
-        for selector in location_selectors:
-            elem = soup.select_one(selector)
-            if elem:
-                return elem.get_text(strip=True)
+        # Prefer the element matched by the structured selectors
+        if elem is not None:
+            return _node_text(elem)
                 
         # Pattern matching for Kenyan locations
-        kenyan_cities = ['Nairobi', 'Mombasa', 'Kisumu', 'Nakuru', 'Eldoret', 'Thika', 'Machakos']
-        for city in kenyan_cities:
-            if city.lower() in text.lower():
+        for city in KENYAN_CITIES:
+            if city in keyword_hits['location']:
                 return city
                 
         return "Kenya"
         
-    def _extract_job_type(self, text: str) -> str:
+    def _extract_job_type(self, keyword_hits: Dict[str, set]) -> str:
         """Extract job type (Full-time, Part-time, Contract, etc.)"""
-        job_types = {
-            'full-time': ['full time', 'full-time', 'permanent', 'regular'],
-            'part-time': ['part time', 'part-time'],
-            'contract': ['contract', 'contractor', 'temporary', 'temp'],
-            'internship': ['intern', 'internship', 'graduate program'],
-            'remote': ['remote', 'work from home', 'wfh'],
-            'freelance': ['freelance', 'consultant', 'independent']
-        }
-        
-        text_lower = text.lower()
-        for job_type, keywords in job_types.items():
-            if any(keyword in text_lower for keyword in keywords):
+        for job_type in JOB_TYPE_KEYWORDS:
+            if job_type in keyword_hits['job_type']:
                 return job_type.title()
                 
         return "Full-time"  # Default
         
-    def _extract_experience_level(self, text: str) -> str:
+    def _extract_experience_level(self, text_lower: str) -> str:
         """Extract required experience level"""
-        experience_patterns = [
-            (r'(\d+)[\+\-\s]*years?\s+experience', 'experience'),
-            (r'entry[\s\-]?level', 'Entry Level'),
-            (r'junior', 'Junior'),
-            (r'senior', 'Senior'),
-            (r'lead', 'Lead'),
-            (r'principal', 'Principal'),
-            (r'manager', 'Manager'),
-            (r'director', 'Director')
-        ]
-        
-        text_lower = text.lower()
-        
         # Check for specific year requirements
-        years_match = re.search(r'(\d+)[\+\-\s]*years?\s+experience', text_lower)
+        years_match = YEARS_EXPERIENCE_RE.search(text_lower)
         if years_match:
             years = int(years_match.group(1))
             if years == 0:
@@ -922,37 +2247,22 @@ class AcademicDetailsProcessor:
                 return "Expert"
                 
         # Check for level keywords
-        for pattern, level in experience_patterns[1:]:
-            if re.search(pattern, text_lower):
+        for pattern, level in EXPERIENCE_LEVEL_PATTERNS:
+            if pattern.search(text_lower):
                 return level
                 
         return "Mid Level"  # Default
         
-    def _extract_salary(self, soup: BeautifulSoup, text: str) -> Optional[Dict]:
+    def _extract_salary(self, elem: Optional[etree._Element], text: str) -> Optional[Dict]:
         """Extract salary information"""
-        # Try structured selectors
-        salary_selectors = [
-            '.salary', '.compensation', '.pay', '.salaryText'
-        ]
-        
-        for selector in salary_selectors:
-            elem = soup.select_one(selector)
-            if elem:
-                salary_text = elem.get_text(strip=True)
-                return self._parse_salary(salary_text)
+        # Prefer the element matched by the structured selectors
+        if elem is not None:
+            salary_text = _node_text(elem)
+            return self._parse_salary(salary_text)
                 
         # Pattern matching for salary
-        salary_patterns = [
-            r'salary:?\s*([^\n]+)',
-            r'compensation:?\s*([^\n]+)',
-            r'ksh\s*[\d,]+',
-            r'kes\s*[\d,]+',
-            r'\$\s*[\d,]+',
-            r'[\d,]+\s*-\s*[\d,]+\s*(?:per|/)\s*(?:month|year)'
-        ]
-        
-        for pattern in salary_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in SALARY_PATTERNS:
+            match = pattern.search(text)
             if match:
                 return self._parse_salary(match.group(0))
                 
@@ -960,17 +2270,18 @@ class AcademicDetailsProcessor:
         
     def _parse_salary(self, salary_text: str) -> Dict:
         """Parse salary text into structured format"""
-        # Extract numbers
-        numbers = re.findall(r'[\d,]+', salary_text.replace(',', ''))
+        # Extract numbers, ignoring thousands separators
+        numbers = SALARY_NUMBER_RE.findall(salary_text.replace(',', ''))
+        salary_lower = salary_text.lower()
         currency = 'KSH'
         
         if '$' in salary_text:
             currency = 'USD'
-        elif 'kes' in salary_text.lower():
+        elif 'kes' in salary_lower:
             currency = 'KES'
             
         period = 'month'
-        if any(word in salary_text.lower() for word in ['year', 'annual', 'yearly']):
+        if 'year' in salary_lower or 'annual' in salary_lower:
             period = 'year'
             
         if len(numbers) >= 2:
@@ -991,22 +2302,17 @@ class AcademicDetailsProcessor:
             
         return {'raw': salary_text}
         
-    def _extract_description(self, soup: BeautifulSoup) -> str:
+    def _extract_description(self, elem: Optional[etree._Element], tree: etree._Element) -> str:
         """Extract job description"""
-        description_selectors = [
-            '.job-description', '.description', '.job-details',
-            '.job-summary', '.overview', '.about-role'
-        ]
-        
-        for selector in description_selectors:
-            elem = soup.select_one(selector)
-            if elem:
-                return elem.get_text(separator=' ', strip=True)[:2000]
+        if elem is not None:
+            return _node_text(elem, ' ', limit=2000)
                 
         # Fallback to main content
-        main_content = soup.find('main') or soup.find('body')
-        if main_content:
-            return main_content.get_text(separator=' ', strip=True)[:2000]
+        main_content = tree.find('.//main')
+        if main_content is None:
+            main_content = tree.find('body')
+        if main_content is not None:
+            return _node_text(main_content, ' ', limit=2000)
             
         return ""
         
@@ -1015,14 +2321,11 @@ class AcademicDetailsProcessor:
         requirements = []
         
         # Look for requirements sections
-        req_sections = re.findall(
-            r'(?:requirements?|qualifications?|must have|essential)[:\n](.*?)(?=\n[A-Z]|\n\n|$)',
-            text, re.IGNORECASE | re.DOTALL
-        )
+        req_sections = REQUIREMENTS_SECTION_RE.findall(text)
         
         for section in req_sections:
             # Split by bullet points or line breaks
-            items = re.split(r'[•\n]\s*', section.strip())
+            items = REQUIREMENT_SPLIT_RE.split(section.strip())
             for item in items:
                 clean_item = item.strip()
                 if len(clean_item) > 10 and len(clean_item) < 200:
@@ -1030,126 +2333,305 @@ class AcademicDetailsProcessor:
                     
         return requirements[:10]  # Limit to 10 requirements
         
-    def _extract_skills(self, text: str) -> List[str]:
+    def _extract_skills(self, text: str, keyword_hits: Dict[str, set]) -> List[str]:
         """Extract required skills"""
-        # Common tech skills patterns
-        skill_patterns = [
-            r'\b(?:Python|Java|JavaScript|TypeScript|C\+\+|C#|PHP|Ruby|Go|Rust|Swift|Kotlin)\b',
-            r'\b(?:React|Angular|Vue|Django|Flask|Spring|Laravel|Rails|Express)\b',
-            r'\b(?:AWS|Azure|GCP|Docker|Kubernetes|Jenkins|Git|Linux|Unix)\b',
-            r'\b(?:SQL|MySQL|PostgreSQL|MongoDB|Redis|Elasticsearch)\b',
-            r'\b(?:HTML|CSS|SASS|Bootstrap|Tailwind)\b',
-            r'\b(?:Machine Learning|AI|Data Science|Analytics|Statistics)\b'
-        ]
-        
         skills = set()
-        text_lower = text.lower()
         
-        for pattern in skill_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            skills.update(matches)
+        for pattern in SKILL_PATTERNS:
+            skills.update(pattern.findall(text))
             
-        # Add soft skills
-        soft_skills = ['communication', 'leadership', 'teamwork', 'problem solving', 'analytical']
-        for skill in soft_skills:
-            if skill in text_lower:
-                skills.add(skill.title())
+        # Add soft skills found by the keyword scan
+        skills.update(keyword_hits['soft_skills'])
                 
         return list(skills)[:15]  # Limit to 15 skills
         
-    def _extract_benefits(self, text: str) -> List[str]:
+    def _extract_benefits(self, keyword_hits: Dict[str, set]) -> List[str]:
         """Extract job benefits"""
-        benefits_keywords = [
-            'health insurance', 'medical', 'dental', 'vision',
-            'vacation', 'pto', 'paid time off', 'sick leave',
-            'retirement', '401k', 'pension', 'bonus',
-            'remote work', 'flexible hours', 'work from home',
-            'training', 'professional development', 'certification',
-            'gym', 'wellness', 'transport', 'parking'
-        ]
-        
         found_benefits = []
-        text_lower = text.lower()
         
-        for benefit in benefits_keywords:
-            if benefit in text_lower:
+        for benefit in BENEFITS_KEYWORDS:
+            if benefit in keyword_hits['benefits']:
                 found_benefits.append(benefit.title())
                 
         return found_benefits[:10]
         
-    def _extract_deadline(self, soup: BeautifulSoup, text: str) -> Optional[str]:
+    def _extract_deadline(self, elem: Optional[etree._Element], text: str) -> Optional[str]:
         """Extract application deadline"""
-        deadline_selectors = [
-            '.deadline', '.closing-date', '.application-deadline'
-        ]
-        
-        for selector in deadline_selectors:
-            elem = soup.select_one(selector)
-            if elem:
-                return elem.get_text(strip=True)
+        if elem is not None:
+            return _node_text(elem)
                 
         # Pattern matching
-        deadline_patterns = [
-            r'deadline:?\s*([^\n]+)',
-            r'closing date:?\s*([^\n]+)',
-            r'apply by:?\s*([^\n]+)'
-        ]
-        
-        for pattern in deadline_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in DEADLINE_PATTERNS:
+            match = pattern.search(text)
             if match:
                 return match.group(1).strip()
                 
         return None
         
-    def _extract_education(self, text: str) -> List[str]:
+    def _extract_education(self, keyword_hits: Dict[str, set]) -> List[str]:
         """Extract education requirements"""
-        education_levels = [
-            'Bachelor', 'Master', 'PhD', 'Doctorate', 'Degree',
-            'Diploma', 'Certificate', 'Associate'
-        ]
-        
         found_education = []
-        text_lower = text.lower()
         
-        for level in education_levels:
-            if level.lower() in text_lower:
+        for level in EDUCATION_LEVELS:
+            if level in keyword_hits['education']:
                 found_education.append(level)
                 
         return found_education
         
-    def _extract_industry(self, text: str) -> str:
+    def _extract_industry(self, keyword_hits: Dict[str, set]) -> str:
         """Extract industry/sector"""
-        industries = {
-            'Technology': ['software', 'tech', 'it', 'developer', 'engineer', 'programming'],
-            'Finance': ['finance', 'banking', 'fintech', 'accounting', 'investment'],
-            'Healthcare': ['health', 'medical', 'hospital', 'clinical', 'pharma'],
-            'Education': ['education', 'teaching', 'university', 'academic', 'research'],
-            'Marketing': ['marketing', 'advertising', 'digital marketing', 'seo', 'social media'],
-            'Sales': ['sales', 'business development', 'account manager', 'customer success'],
-            'Manufacturing': ['manufacturing', 'production', 'factory', 'industrial'],
-            'Retail': ['retail', 'e-commerce', 'store', 'merchandise'],
-            'Consulting': ['consulting', 'advisory', 'strategy', 'management consulting']
-        }
-        
-        text_lower = text.lower()
-        
-        for industry, keywords in industries.items():
-            if any(keyword in text_lower for keyword in keywords):
+        for industry in INDUSTRY_KEYWORDS:
+            if industry in keyword_hits['industry']:
                 return industry
                 
         return "General"
+
+
+# Process pool for CPU-bound extraction, created on first use
+_extraction_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_extraction_executor() -> ProcessPoolExecutor:
+    """Return the extraction process pool, creating it on first use"""
+    global _extraction_executor
+    if _extraction_executor is None:
+        _extraction_executor = ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _extraction_executor
+
+
+def _extract_job_sync(html_content: bytes, title: str, encoding: Optional[str] = None) -> Dict:
+    """Process pool entry point for JobExtractor.extract"""
+    return JobExtractor().extract(html_content, title, encoding)
+
+
+def _json_payload(content: str) -> str:
+    """Strip markdown fences and surrounding prose from a JSON AI response"""
+    text = content.strip()
+    if text.startswith('```'):
+        # Drop the opening fence (and its language tag) and the closing fence
+        text = text.split('\n', 1)[-1].rsplit('```', 1)[0]
+    starts = [i for i in (text.find('{'), text.find('[')) if i != -1]
+    if starts:
+        start = min(starts)
+        end = text.rfind('}' if text[start] == '{' else ']')
+        text = text[start:end + 1]
+    return text
+
+
+def _parse_ai_json(content: str) -> Any:
+    """Parse a JSON AI response, tolerating markdown fences and surrounding prose
+    
+    Raises:
+        json.JSONDecodeError: If no JSON object or array can be parsed
+    """
+    return orjson.loads(_json_payload(content))
+
+
+class JobProcessor:
+    def __init__(self):
+        self.session = None
+        self.ai_client = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._host_backoff: Dict[str, float] = {}
+        self._fetch_cache = diskcache.Cache(os.path.join(CACHE_DIR, 'pages'))
+        self._ai_cache = diskcache.Cache(os.path.join(CACHE_DIR, 'ai'))
+        # AI requests currently in flight, keyed by AI cache key
+        self._inflight_ai: Dict[str, asyncio.Future] = {}
+        self._init_ai_client()
         
-    async def _enhance_with_ai(self, extracted_data: Dict, full_content: str) -> Dict:
-        """Use AI to enhance and validate extracted information"""
-        if not self.ai_client:
-            return {}
+    def _init_ai_client(self):
+        """Initialize AI client for content processing"""
+        try:
+            self.ai_client = LlmChat(api_key=os.environ.get('OPENAI_API_KEY'))
+        except Exception as e:
+            logger.error("Failed to initialize AI client: %s", e)
+            
+    async def __aenter__(self):
+        """Async context manager entry"""
+        self.session = await _get_shared_session()
+        return self
+        
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit
+        
+        The shared session stays open for the next processor; use
+        close_shared_session() to release it.
+        """
+        self.session = None
+        self._fetch_cache.close()
+        self._ai_cache.close()
+            
+    async def process_job(self, job_record: Dict) -> Dict:
+        """
+        Process a single job record and extract structured information
+        
+        Args:
+            job_record: Basic job data with title and link
             
+        Returns:
+            Processed job data with extracted information
+        """
         try:
-            # Prepare content for AI analysis
-            content_summary = full_content[:3000]  # Limit content length
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Processing job: %s", job_record.get('title', 'Unknown'))
             
-            prompt = f"""
+            # Fetch and extract structured information
+            fetched = await self._fetch_and_extract(job_record)
+            if fetched is None:
+                return self._create_failed_record(job_record, "Failed to fetch content")
+            content_summary, extracted_data = fetched
+            
+            # Enhance with AI analysis
+            ai_enhanced_data = await self._enhance_with_ai(extracted_data, content_summary)
+            
+            # Create final processed record
+            processed_record = self._create_processed_record(job_record, extracted_data, ai_enhanced_data)
+            
+            logger.debug("Successfully processed job: %s", processed_record['title'])
+            return processed_record
+            
+        except Exception as e:
+            logger.error("Error processing job %s: %s", job_record.get('link', 'Unknown'), e)
+            return self._create_failed_record(job_record, str(e))
+            
+    def _finalize_job(self, job_record: Dict, extracted_data: Dict, ai_data: Dict) -> Dict:
+        """Build the processed record, falling back to a failed record on error"""
+        try:
+            processed_record = self._create_processed_record(job_record, extracted_data, ai_data)
+            logger.debug("Successfully processed job: %s", processed_record['title'])
+            return processed_record
+        except Exception as e:
+            logger.error("Error processing job %s: %s", job_record.get('link', 'Unknown'), e)
+            return self._create_failed_record(job_record, str(e))
+        
+    async def _fetch_and_extract(self, job_record: Dict) -> Optional[tuple]:
+        """Fetch a job posting and extract its structured information
+        
+        Returns:
+            (content_summary, extracted_data), or None if the content could not be fetched
+        """
+        page = await self._fetch_job_content(job_record['link'])
+        if not page:
+            logger.warning("Failed to fetch content for %s", job_record['link'])
+            return None
+            
+        extracted_data = await self._extract_job_information(*page, job_record)
+        return extracted_data['content_summary'], extracted_data
+            
+    async def _extract_job_information(self, html_content: bytes, encoding: Optional[str], job_record: Dict) -> Dict:
+        """Extract structured information in the process pool
+        
+        Parsing and regex extraction are CPU bound; running them off the
+        event loop keeps other jobs' fetches moving.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _get_extraction_executor(), _extract_job_sync, html_content, job_record.get('title', ''), encoding
+        )
+        
+    async def _fetch_job_content(self, job_url: str) -> Optional[tuple[bytes, Optional[str]]]:
+        """Fetch full job posting content
+        
+        A host answering 429/503 is backed off for its Retry-After period,
+        and the request is retried once after waiting. Pages cached with an
+        ETag/Last-Modified are revalidated and reused on 304 Not Modified.
+        
+        Returns:
+            (body, charset) with the body left undecoded for the parser, or
+            None if the page could not be fetched
+        """
+        loop = asyncio.get_running_loop()
+        netloc = urlparse(job_url).netloc
+        host_semaphore = self._host_semaphores.setdefault(netloc, asyncio.Semaphore(HOST_CONCURRENCY))
+        try:
+            cached = self._fetch_cache.get(job_url)
+            headers = {}
+            if cached:
+                etag, last_modified, _, _ = cached
+                if etag:
+                    headers['If-None-Match'] = etag
+                if last_modified:
+                    headers['If-Modified-Since'] = last_modified
+                    
+            for attempt in range(2):
+                # Respect any backoff the host asked for
+                delay = self._host_backoff.get(netloc, 0) - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    
+                async with host_semaphore, self.session.get(job_url, headers=headers) as response:
+                    if response.status == 200:
+                        page = (await self._read_capped(response), response.charset)
+                        etag = response.headers.get('ETag')
+                        last_modified = response.headers.get('Last-Modified')
+                        if etag or last_modified:
+                            self._fetch_cache.set(job_url, (etag, last_modified, *page), expire=CACHE_EXPIRE)
+                        return page
+                    elif response.status == 304 and cached:
+                        return cached[2], cached[3]
+                    elif response.status in (429, 503):
+                        retry_after = self._parse_retry_after(response.headers.get('Retry-After'))
+                        self._host_backoff[netloc] = max(
+                            self._host_backoff.get(netloc, 0), loop.time() + retry_after
+                        )
+                        logger.warning("HTTP %s for %s, backing off %.0fs", response.status, job_url, retry_after)
+                    else:
+                        logger.warning("HTTP %s for %s", response.status, job_url)
+                        return None
+            return None
+        except Exception as e:
+            logger.error("Error fetching %s: %s", job_url, e)
+            return None
+            
+    @staticmethod
+    async def _read_capped(response: aiohttp.ClientResponse) -> bytes:
+        """Read the response body, stopping after MAX_CONTENT_BYTES"""
+        chunks = []
+        total = 0
+        async for chunk in response.content.iter_chunked(16384):
+            chunks.append(chunk)
+            total += len(chunk)
+            if total >= MAX_CONTENT_BYTES:
+                break
+        return b''.join(chunks)
+        
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> float:
+        """Convert a Retry-After header (seconds or HTTP date) into a delay"""
+        if not value:
+            return DEFAULT_RETRY_AFTER
+        try:
+            delay = float(value)
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(value)
+                delay = (retry_at - datetime.now(retry_at.tzinfo)).total_seconds()
+            except (TypeError, ValueError):
+                return DEFAULT_RETRY_AFTER
+        return min(max(delay, 0.0), MAX_RETRY_AFTER)
+            
+    @staticmethod
+    def _ai_cache_key(extracted_data: Dict, full_content: str) -> str:
+        """Key an AI enhancement by prompt version and the job data sent to the AI"""
+        key_source = "\n".join([
+            AI_PROMPT_VERSION, AI_ENHANCEMENT_FIELDS,
+            str(extracted_data.get('title', 'Unknown')), str(extracted_data.get('company', 'Unknown')),
+            full_content[:AI_CONTENT_CHARS]
+        ])
+        return hashlib.blake2b(key_source.encode('utf-8'), digest_size=20).hexdigest()
+        
+    @staticmethod
+    def _worth_enhancing(full_content: str) -> bool:
+        """Whether a job has enough text for the AI to add anything"""
+        return len(full_content[:AI_CONTENT_CHARS].split()) >= AI_MIN_CONTENT_WORDS
+        
+    @staticmethod
+    def _build_ai_prompt(extracted_data: Dict, full_content: str) -> str:
+        """Build the enhancement prompt for a single job"""
+        # Prepare content for AI analysis
+        content_summary = full_content[:AI_CONTENT_CHARS]  # Limit content length
+        
+        return f"""
             Analyze this job posting and extract/enhance the following information:
             
             Job Title: {extracted_data.get('title', 'Unknown')}
@@ -1158,31 +2640,210 @@ class AcademicDetailsProcessor:
             Content: {content_summary}
             
             Please provide a JSON response with:
-            1. skills_analysis: Most important skills required (list of 5-10 skills)
-            2. experience_summary: Brief summary of experience requirements
-            3. role_level: Entry/Junior/Mid/Senior/Executive
-            4. remote_friendly: true/false based on remote work mentions
-            5. growth_potential: Low/Medium/High career growth potential
-            6. industry_category: Primary industry category
-            7. key_responsibilities: Top 3-5 main responsibilities
+            {AI_ENHANCEMENT_FIELDS}
             
             Return only valid JSON.
             """
+        
+    async def _enhance_with_ai(self, extracted_data: Dict, full_content: str) -> Dict:
+        """Use AI to enhance and validate extracted information"""
+        if not self.ai_client or not self._worth_enhancing(full_content):
+            return {}
+            
+        cache_key = self._ai_cache_key(extracted_data, full_content)
+        cached = self._ai_cache.get(cache_key)
+        if cached is not None:
+            return cached
             
+        async def request():
+            ai_data = await self._request_ai(extracted_data, full_content)
+            if ai_data:
+                self._ai_cache.set(cache_key, ai_data, expire=CACHE_EXPIRE)
+            return ai_data
+            
+        # A duplicate job already being enhanced is awaited, not requested again
+        return await _singleflight(self._inflight_ai, cache_key, request)
+        
+    async def _request_ai(self, extracted_data: Dict, full_content: str) -> Dict:
+        """Enhance a single job with one AI request, bypassing the cache"""
+        try:
+            prompt = self._build_ai_prompt(extracted_data, full_content)
             response = await self.ai_client.chat([UserMessage(content=prompt)])
             
             # Parse AI response
             try:
-                ai_data = json.loads(response.content)
-                return ai_data
+                return _parse_ai_json(response.content)
             except json.JSONDecodeError:
                 logger.warning("Failed to parse AI response as JSON")
                 return {}
                 
         except Exception as e:
-            logger.error(f"Error in AI enhancement: {e}")
+            logger.error("Error in AI enhancement: %s", e)
             return {}
             
+    async def _enhance_batch_with_ai(self, extracted_list: List[Dict], content_list: List[str]) -> List[Dict]:
+        """Enhance several jobs, sending only those without a cached result to the AI"""
+        if not self.ai_client:
+            return [{} for _ in extracted_list]
+            
+        cache_keys = [self._ai_cache_key(e, c) for e, c in zip(extracted_list, content_list)]
+        results = [
+            self._ai_cache.get(cache_key) if self._worth_enhancing(content) else {}
+            for cache_key, content in zip(cache_keys, content_list)
+        ]
+        
+        # Duplicate jobs share one request; jobs already in flight elsewhere wait for it
+        pending: Dict[str, List[int]] = {}
+        waiting = []
+        for i, ai_data in enumerate(results):
+            if ai_data is not None:
+                continue
+            cache_key = cache_keys[i]
+            if cache_key in self._inflight_ai:
+                waiting.append((i, self._inflight_ai[cache_key]))
+            else:
+                if cache_key not in pending:
+                    _start_flight(self._inflight_ai, cache_key)
+                pending.setdefault(cache_key, []).append(i)
+                
+        if pending:
+            try:
+                first = [indices[0] for indices in pending.values()]
+                fresh = await self._request_batch_ai(
+                    [extracted_list[i] for i in first], [content_list[i] for i in first]
+                )
+                for (cache_key, indices), ai_data in zip(pending.items(), fresh):
+                    for i in indices:
+                        results[i] = ai_data
+                    if ai_data:
+                        self._ai_cache.set(cache_key, ai_data, expire=CACHE_EXPIRE)
+                    self._inflight_ai[cache_key].set_result(ai_data)
+            finally:
+                # Waiters fall back to no enhancement, as a failed request would give them
+                for cache_key in pending:
+                    future = self._inflight_ai.pop(cache_key)
+                    if not future.done():
+                        future.set_result({})
+                        
+        for i, future in waiting:
+            results[i] = await asyncio.shield(future)
+        return results
+        
+    async def _request_batch_ai(self, extracted_list: List[Dict], content_list: List[str]) -> List[Dict]:
+        """Enhance several jobs with a single AI request
+        
+        Falls back to per-job enhancement when the response cannot be
+        matched back to the jobs it was asked about.
+        """
+        if len(extracted_list) == 1:
+            return [await self._request_ai(extracted_list[0], content_list[0])]
+            
+        try:
+            job_sections = "\n".join(
+                f"""
+            ### Job {i}
+            Job Title: {extracted_data.get('title', 'Unknown')}
+            Company: {extracted_data.get('company', 'Unknown')}
+            
+            Content: {full_content[:AI_CONTENT_CHARS]}
+            """
+                for i, (extracted_data, full_content) in enumerate(zip(extracted_list, content_list), 1)
+            )
+            
+            prompt = f"""
+            Analyze each of the {len(extracted_list)} job postings below and extract/enhance the following information:
+            {job_sections}
+            
+            For each job, provide a JSON object with:
+            {AI_ENHANCEMENT_FIELDS}
+            
+            Return only a valid JSON array containing exactly {len(extracted_list)} objects, in the same order as the jobs.
+            """
+            
+            response = await self.ai_client.chat([UserMessage(content=prompt)])
+            
+            # Parse AI response and split it back per job
+            try:
+                ai_list = _parse_ai_json(response.content)
+                if (isinstance(ai_list, list) and len(ai_list) == len(extracted_list)
+                        and all(isinstance(ai_data, dict) for ai_data in ai_list)):
+                    return ai_list
+                logger.warning("Batch AI response does not match the submitted jobs")
+            except json.JSONDecodeError:
+                logger.warning("Failed to parse batch AI response as JSON")
+                
+        except Exception as e:
+            logger.error("Error in batch AI enhancement: %s", e)
+            
+        # Fall back to one request per job
+        return list(await asyncio.gather(*[
+            self._request_ai(extracted_data, full_content)
+            for extracted_data, full_content in zip(extracted_list, content_list)
+        ]))
+            
+    async def _enhance_offline(self, extracted_list: List[Dict], content_list: List[str]) -> List[Dict]:
+        """Enhance jobs through the OpenAI Batch API
+        
+        Batch requests cost half as much as interactive ones but can take up
+        to 24 hours, so this suits backfills rather than live scraping. Jobs
+        with a cached result are not resubmitted.
+        """
+        cache_keys = [self._ai_cache_key(e, c) for e, c in zip(extracted_list, content_list)]
+        results = [
+            self._ai_cache.get(cache_key) if self._worth_enhancing(content) else {}
+            for cache_key, content in zip(cache_keys, content_list)
+        ]
+        pending = [i for i, ai_data in enumerate(results) if ai_data is None]
+        if not pending:
+            return results
+            
+        try:
+            client = AsyncOpenAI(api_key=os.environ.get('OPENAI_API_KEY'))
+            requests_jsonl = b'\n'.join(
+                orjson.dumps({
+                    'custom_id': str(i),
+                    'method': 'POST',
+                    'url': '/v1/chat/completions',
+                    'body': {
+                        'model': OFFLINE_AI_MODEL,
+                        'messages': [{'role': 'user', 'content': self._build_ai_prompt(extracted_list[i], content_list[i])}],
+                        'response_format': {'type': 'json_object'}
+                    }
+                })
+                for i in pending
+            )
+            batch_file = await client.files.create(file=('job_enhancement.jsonl', requests_jsonl), purpose='batch')
+            batch = await client.batches.create(
+                input_file_id=batch_file.id, endpoint='/v1/chat/completions', completion_window='24h'
+            )
+            logger.info("Submitted AI batch %s with %s jobs", batch.id, len(pending))
+            
+            while batch.status not in ('completed', 'failed', 'expired', 'cancelled'):
+                await asyncio.sleep(OFFLINE_POLL_INTERVAL)
+                batch = await client.batches.retrieve(batch.id)
+                
+            if batch.status != 'completed':
+                logger.warning("AI batch %s ended with status %s", batch.id, batch.status)
+                
+            # Expired batches still return the requests that finished in time
+            if batch.output_file_id:
+                output = await client.files.content(batch.output_file_id)
+                for line in output.text.splitlines():
+                    result = orjson.loads(line)
+                    i = int(result['custom_id'])
+                    try:
+                        ai_data = _parse_ai_json(result['response']['body']['choices'][0]['message']['content'])
+                    except (TypeError, KeyError, IndexError, json.JSONDecodeError):
+                        logger.warning("Failed to parse AI batch result for job %s", extracted_list[i].get('title', 'Unknown'))
+                        continue
+                    results[i] = ai_data
+                    self._ai_cache.set(cache_keys[i], ai_data, expire=CACHE_EXPIRE)
+                    
+        except Exception as e:
+            logger.error("Error in offline AI enhancement: %s", e)
+            
+        return [ai_data if ai_data is not None else {} for ai_data in results]
+        
     def _create_processed_record(self, original_record: Dict, extracted_data: Dict, ai_data: Dict) -> Dict:
         """Create final processed job record"""
         processed_record = {
@@ -1257,29 +2918,102 @@ class AcademicDetailsProcessor:
 
 
 # Convenience function for processing batches
-async def process_job_batch(job_records: List[Dict], batch_size: int = 5) -> List[Dict]:
+async def process_job_batch(job_records: List[Dict], batch_size: int = 5,
+                            fetch_workers: int = 10, ai_workers: int = 2,
+                            realtime: bool = True) -> List[Dict]:
     """
     Process a batch of job records
+    
+    Fetching/extraction and AI enhancement run as two overlapping stages:
+    fetch workers feed a bounded queue, and AI workers drain it, enhancing
+    up to batch_size ready jobs with a single AI request. A worker picks up
+    the next job as soon as its current one finishes, so one slow page
+    never holds back the rest. Throttled hosts are paced inside
+    _fetch_job_content.
+    
+    Args:
+        job_records: Basic job data with title and link
+        batch_size: Maximum number of jobs sent in one AI request
+        fetch_workers: Concurrent fetch/extract workers (network bound)
+        ai_workers: Concurrent AI requests (bounded by the provider's rate limit)
+        realtime: If False, enhance every job in one OpenAI Batch API job
+            instead; half the cost, but results can take up to 24 hours
+        
+    Returns:
+        Processed job data, in the same order as job_records
     """
-    processed_jobs = []
+    processed_jobs: List[Optional[Dict]] = [None] * len(job_records)
+    pending = asyncio.Queue()
+    for item in enumerate(job_records):
+        pending.put_nowait(item)
+    # Offline runs collect every extracted job before enhancing any of them
+    extracted_queue = asyncio.Queue(maxsize=2 * batch_size if realtime else 0)
+    
+    completed = 0
     
     async with JobProcessor() as processor:
-        # Process jobs in smaller batches to avoid overwhelming servers
-        for i in range(0, len(job_records), batch_size):
-            batch = job_records[i:i + batch_size]
+        def finish(index: int, record: Dict):
+            # Jobs finish out of order; report progress as each one lands
+            nonlocal completed
+            processed_jobs[index] = record
+            completed += 1
+            logger.info("Processed %s/%s jobs", completed, len(job_records))
             
-            # Process batch concurrently
-            tasks = [processor.process_job(job) for job in batch]
-            batch_results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            for result in batch_results:
-                if isinstance(result, Exception):
-                    logger.error(f"Batch processing error: {result}")
-                else:
-                    processed_jobs.append(result)
+        async def fetch_worker():
+            while not pending.empty():
+                index, job_record = pending.get_nowait()
+                try:
+                    fetched = await processor._fetch_and_extract(job_record)
+                    if fetched is None:
+                        finish(index, processor._create_failed_record(job_record, "Failed to fetch content"))
+                    else:
+                        await extracted_queue.put((index, job_record, *fetched))
+                except Exception as e:
+                    logger.error("Error processing job %s: %s", job_record.get('link', 'Unknown'), e)
+                    finish(index, processor._create_failed_record(job_record, str(e)))
                     
-            # Small delay between batches
-            if i + batch_size < len(job_records):
-                await asyncio.sleep(2)
-                
-    return processed_jobs
\ No newline at end of file
+        async def ai_worker():
+            done = False
+            while not done:
+                # Wait for one job, then take whatever else is already extracted
+                batch = []
+                item = await extracted_queue.get()
+                while item is not None:
+                    batch.append(item)
+                    if len(batch) == batch_size or extracted_queue.empty():
+                        break
+                    item = extracted_queue.get_nowait()
+                done = item is None
+                if not batch:
+                    continue
+                    
+                try:
+                    ai_results = await processor._enhance_batch_with_ai(
+                        [extracted_data for _, _, _, extracted_data in batch],
+                        [content_summary for _, _, content_summary, _ in batch]
+                    )
+                except Exception as e:
+                    logger.error("Batch processing error: %s", e)
+                    ai_results = [{} for _ in batch]
+                for (index, job_record, _, extracted_data), ai_data in zip(batch, ai_results):
+                    finish(index, processor._finalize_job(job_record, extracted_data, ai_data))
+                    
+        if realtime:
+            ai_tasks = [asyncio.create_task(ai_worker()) for _ in range(ai_workers)]
+            await asyncio.gather(*[fetch_worker() for _ in range(fetch_workers)])
+            
+            # One sentinel per AI worker once every job has been queued
+            for _ in ai_tasks:
+                await extracted_queue.put(None)
+            await asyncio.gather(*ai_tasks)
+        else:
+            await asyncio.gather(*[fetch_worker() for _ in range(fetch_workers)])
+            staged = [extracted_queue.get_nowait() for _ in range(extracted_queue.qsize())]
+            ai_results = await processor._enhance_offline(
+                [extracted_data for _, _, _, extracted_data in staged],
+                [content_summary for _, _, content_summary, _ in staged]
+            )
+            for (index, job_record, _, extracted_data), ai_data in zip(staged, ai_results):
+                finish(index, processor._finalize_job(job_record, extracted_data, ai_data))
+        
+    return [job for job in processed_jobs if job is not None]
\ No newline at end of file
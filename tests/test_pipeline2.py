@@ -0,0 +1,353 @@
+import asyncio
+import functools
+import json
+import sqlite3
+
+import httpx
+import lxml.html
+import pytest
+
+pytest.importorskip("emergentintegrations")
+
+from langchain_core.exceptions import OutputParserException
+from openai import APIConnectionError
+from pydantic import ValidationError
+
+from processors.pipeline2 import (
+    AcademicDetailsProcessor,
+    CombinedExtraction,
+    CombinedExtractionBatch,
+    EducationExtraction,
+    JobExtraction,
+    JobExtractor,
+    _collect_fields,
+    _parse_ai_json,
+)
+
+JOB_PAGE = """
+<html>
+<head><title>Junior Python Developer</title><script>var company = "Tracking Co";</script></head>
+<body>
+<nav>Jobs in Mombasa | Post a job</nav>
+<main>
+  <h1>Junior Python Developer</h1>
+  <div class="employer-name">Jobs Board Ltd</div>
+  <div class="card company-name">Acme Fintech</div>
+  <span data-testid="job-location">Westlands, Nairobi</span>
+  <div class="salary">KSh 80,000 - 120,000 per month</div>
+  <div class="job-description">
+    <p>Part-time role building payment APIs with Python and Django.</p>
+    <p>We offer medical cover, a pension and flexible hours.</p>
+    <p>Applicants need a Bachelor or Diploma and strong communication and leadership.</p>
+  </div>
+</main>
+</body>
+</html>
+""".encode()
+
+POSTING = "Senior Python Developer in Nairobi. Requires a B.S. in Computer Science and 5 years experience."
+
+
+class FakeChain:
+    """Stands in for the extraction chains, returning one shared extraction"""
+
+    def __init__(self):
+        self.extraction = CombinedExtraction(
+            job=JobExtraction(title_clean="Python Developer"),
+            education=EducationExtraction(requirements=[])
+        )
+        self.calls = 0
+
+    async def ainvoke(self, inputs):
+        self.calls += 1
+        # Stay in flight long enough for the duplicate posting to join this call
+        await asyncio.sleep(0.05)
+        if "count" in inputs:
+            return CombinedExtractionBatch(postings=[self.extraction] * inputs["count"])
+        return self.extraction
+
+
+class FailingChain(FakeChain):
+    """Raises the given errors, one per call, before returning the extraction"""
+
+    def __init__(self, *errors):
+        super().__init__()
+        self.errors = list(errors)
+
+    async def ainvoke(self, inputs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.extraction
+
+
+def make_jobs_db(path, rows):
+    """Create a jobs_data input database holding (id, full_link, content) rows"""
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE jobs_data (id INTEGER PRIMARY KEY, full_link TEXT, content TEXT)")
+    conn.executemany("INSERT INTO jobs_data VALUES (?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def make_processor(tmp_path, **kwargs):
+    processor = AcademicDetailsProcessor(
+        input_db_path=str(tmp_path / "jobs.sqlite3"),
+        output_db_path=str(tmp_path / "processed_jobs.sqlite3"),
+        api_key="sk-test",
+        **kwargs
+    )
+    processor.embeddings = None
+    processor.extraction_chain = processor.batch_extraction_chain = FakeChain()
+    return processor
+
+
+@pytest.fixture
+def processor(tmp_path):
+    processor = make_processor(tmp_path)
+    yield processor
+    processor.close()
+
+
+@pytest.mark.parametrize("postings_per_call", [1, 2])
+def test_duplicate_postings_keep_their_own_link(tmp_path, postings_per_call):
+    make_jobs_db(tmp_path / "jobs.sqlite3", [
+        (1, "https://jobs.example.com/1", POSTING),
+        (2, "https://jobs.example.com/2", POSTING),
+    ])
+    processor = make_processor(tmp_path, postings_per_call=postings_per_call)
+
+    try:
+        results = processor.batch_extract()
+    finally:
+        processor.close()
+
+    assert [job.full_link for job, _ in results] == ["https://jobs.example.com/1", "https://jobs.example.com/2"]
+    assert all(job.title_clean == "Python Developer" for job, _ in results)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("B.S. in CS", "Bachelor of Science in CS"),
+    ("Requires a Ph.D.", "Requires a Doctor of Philosophy"),
+    ("M.A.  or   b.a. preferred", "Master of Arts or Bachelor of Arts preferred"),
+    ("THE B.S.C. PROGRAM", "THE B.S.C. PROGRAM"),
+])
+def test_preprocess_text_expands_degree_abbreviations(processor, text, expected):
+    assert processor._preprocess_text(text) == expected
+
+
+def test_batch_extract_pages_past_stored_jobs(tmp_path, monkeypatch):
+    links = [f"https://jobs.example.com/{job_id}" for job_id in range(1, 8)]
+    make_jobs_db(tmp_path / "jobs.sqlite3", [
+        (job_id, link, f"{POSTING} Reference {job_id}.") for job_id, link in enumerate(links, 1)
+    ])
+    # One call in flight and a commit per job, so later pages are queried
+    # after earlier jobs have been stored as completed
+    processor = make_processor(tmp_path, postings_per_call=2, batch_size=1)
+    monkeypatch.setattr(processor, "iter_unprocessed_jobs",
+                        functools.partial(processor.iter_unprocessed_jobs, chunk_size=3))
+
+    try:
+        results = processor.batch_extract()
+        remaining = list(processor.iter_unprocessed_jobs())
+    finally:
+        processor.close()
+
+    assert [job.full_link for job, _ in results] == links
+    assert remaining == []
+
+
+def test_failed_group_gets_empty_results(processor, monkeypatch):
+    async def fail(jobs):
+        raise RuntimeError("provider down")
+    monkeypatch.setattr(processor, "extract_and_store_many_async", fail)
+
+    results = asyncio.run(processor._extract_group_async([
+        (1, "https://jobs.example.com/1", POSTING), (2, "https://jobs.example.com/2", POSTING)
+    ]))
+
+    assert [job.full_link for job, _ in results] == ["https://jobs.example.com/1", "https://jobs.example.com/2"]
+    assert all(education.requirements == [] for _, education in results)
+
+
+def test_career_insights_skip_malformed_skill_lists(processor, tmp_path):
+    processor._conn.executemany(
+        "INSERT INTO skills_taxonomy (job_id, technical_skills, programming_languages, frameworks) "
+        "VALUES (?, ?, ?, ?)",
+        [
+            (1, '["SQL", "Git"]', '["Python"]', '["Django"]'),
+            (2, '["SQL"', '["Python"]', None),
+            (3, '["SQL"]', 'Python, Go', '["Django"]'),
+        ]
+    )
+    output_file = tmp_path / "career_insights.json"
+
+    assert processor.export_career_insights(str(output_file))
+
+    in_demand = json.loads(output_file.read_text())["in_demand_skills"]
+    assert in_demand == {"SQL": 2, "Python": 2, "Django": 2, "Git": 1}
+
+
+def test_store_failure_in_batched_call_only_affects_its_job(tmp_path, monkeypatch):
+    make_jobs_db(tmp_path / "jobs.sqlite3", [
+        (1, "https://jobs.example.com/1", POSTING),
+        (2, "https://jobs.example.com/2", f"{POSTING} Hybrid role."),
+    ])
+    processor = make_processor(tmp_path, postings_per_call=2)
+    store_extraction = processor._store_extraction
+    failed = []
+
+    def store_once_failing(job_id, full_link, content, extraction):
+        if job_id == 1 and not failed:
+            failed.append(job_id)
+            raise sqlite3.OperationalError("database is locked")
+        return store_extraction(job_id, full_link, content, extraction)
+    monkeypatch.setattr(processor, "_store_extraction", store_once_failing)
+
+    try:
+        results = processor.batch_extract()
+    finally:
+        processor.close()
+
+    assert failed == [1]
+    assert [job.full_link for job, _ in results] == ["https://jobs.example.com/1", "https://jobs.example.com/2"]
+    # Both extractions were cached, so only the failed store was retried
+    assert processor.batch_extraction_chain.calls == 1
+
+
+@pytest.mark.parametrize("salary_text, expected", [
+    ("KSh 50,000 - 80,000 per month",
+     {"min": 50000, "max": 80000, "currency": "KSH", "period": "month"}),
+    ("$1,200,000 annually", {"amount": 1200000, "currency": "USD", "period": "year"}),
+    ("KES 120000 to 150000 a year", {"min": 120000, "max": 150000, "currency": "KES", "period": "year"}),
+])
+def test_parse_salary(salary_text, expected):
+    assert JobExtractor()._parse_salary(salary_text) == {**expected, "raw": salary_text}
+
+
+def test_parse_salary_without_numbers():
+    assert JobExtractor()._parse_salary("Competitive") == {"raw": "Competitive"}
+
+
+@pytest.mark.parametrize("content, expected", [
+    ('{"industry": "Technology"}', {"industry": "Technology"}),
+    ('```json\n{"industry": "Technology"}\n```', {"industry": "Technology"}),
+    ('Here is the analysis:\n{"skills": ["SQL", "Python"]}\nLet me know if you need more.',
+     {"skills": ["SQL", "Python"]}),
+    ('```\n[{"industry": "Finance"}, {"industry": "Health"}]\n```',
+     [{"industry": "Finance"}, {"industry": "Health"}]),
+    ('Results: [{"level": "entry"}] (2 jobs analysed)', [{"level": "entry"}]),
+])
+def test_parse_ai_json(content, expected):
+    assert _parse_ai_json(content) == expected
+
+
+def test_parse_ai_json_without_json():
+    with pytest.raises(json.JSONDecodeError):
+        _parse_ai_json("I could not analyse this posting.")
+
+
+def validation_error():
+    try:
+        JobExtraction.model_validate({"experience_required": {"years": 2}})
+    except ValidationError as e:
+        return e
+
+
+@pytest.mark.parametrize("errors", [
+    [APIConnectionError(request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))],
+    [OutputParserException("model returned no extraction function call")],
+    [validation_error(), validation_error()],
+])
+def test_transient_extraction_errors_are_retried(processor, monkeypatch, errors):
+    monkeypatch.setattr("processors.pipeline2.RETRY_BASE_DELAY", 0)
+    processor.extraction_chain = chain = FailingChain(*errors)
+
+    job, _ = asyncio.run(processor.extract_and_store_async(1, "https://jobs.example.com/1", POSTING))
+
+    assert chain.calls == len(errors) + 1
+    assert job.title_clean == "Python Developer"
+
+
+def test_extraction_gives_up_after_max_retries(processor, monkeypatch):
+    monkeypatch.setattr("processors.pipeline2.RETRY_BASE_DELAY", 0)
+    processor.extraction_chain = chain = FailingChain(*[OutputParserException("no call")] * 5)
+
+    job, _ = asyncio.run(processor.extract_and_store_async(1, "https://jobs.example.com/1", POSTING))
+
+    assert chain.calls == processor.max_retries
+    assert job.title_clean is None
+
+
+@pytest.mark.parametrize("error", [ValueError("bad prompt input"), KeyError("text")])
+def test_other_extraction_errors_are_not_retried(processor, error):
+    processor.extraction_chain = chain = FailingChain(error)
+
+    job, _ = asyncio.run(processor.extract_and_store_async(1, "https://jobs.example.com/1", POSTING))
+
+    assert chain.calls == 1
+    assert job.title_clean is None
+
+
+def test_chain_text_keeps_opening_and_requirements(processor):
+    processor.max_chain_chars = 200
+    opening = "Data Analyst at Acme Ltd, Nairobi. " + "About us: we build payments. " * 10
+    requirements = "Requirements: Bachelor of Science in Statistics and 2 years of SQL. " * 5
+    text = opening + requirements
+
+    trimmed = processor._chain_text(text)
+
+    assert trimmed.startswith(text[:50] + " ... Requirements: Bachelor of Science")
+    assert len(trimmed) == 200 + len(" ... ")
+
+
+def test_chain_text_limits(processor):
+    processor.max_chain_chars = 200
+    unanchored = "We build payments. " * 20
+
+    assert processor._chain_text(POSTING) == POSTING
+    assert processor._chain_text(unanchored) == unanchored[:200]
+    processor.max_chain_chars = None
+    assert processor._chain_text(unanchored) == unanchored
+
+
+def test_collect_fields_prefers_highest_priority_selector():
+    tree = lxml.html.document_fromstring(JOB_PAGE)
+
+    fields = _collect_fields(tree)
+
+    assert fields["company"].text == "Acme Fintech"
+    assert fields["location"].text == "Westlands, Nairobi"
+    assert fields["salary"].text == "KSh 80,000 - 120,000 per month"
+    assert fields["description"].get("class") == "job-description"
+    assert "deadline" not in fields
+
+
+def test_extract_job_page():
+    extracted = JobExtractor().extract(JOB_PAGE, "Junior Python Developer")
+
+    assert extracted["company"] == "Acme Fintech"
+    assert extracted["location"] == "Westlands, Nairobi"
+    assert extracted["job_type"] == "Part-Time"
+    assert extracted["experience_level"] == "Junior"
+    assert extracted["salary"] == {
+        "min": 80000, "max": 120000, "currency": "KSH", "period": "month",
+        "raw": "KSh 80,000 - 120,000 per month"
+    }
+    assert extracted["benefits"] == ["Medical", "Pension", "Flexible Hours"]
+    assert extracted["education"] == ["Bachelor", "Diploma"]
+    assert extracted["industry"] == "Technology"
+    assert set(extracted["skills"]) == {"Python", "Django", "Communication", "Leadership"}
+    assert "Tracking Co" not in extracted["full_text"]
+    assert extracted["content_summary"].startswith("Part-time role building payment APIs")
+
+
+def test_extract_falls_back_to_keywords_without_structured_fields():
+    page = b"<html><body><p>Contract accountant based in Kisumu. Transport and medical provided.</p></body></html>"
+
+    extracted = JobExtractor().extract(page, "Accountant")
+
+    assert extracted["location"] == "Kisumu"
+    assert extracted["job_type"] == "Contract"
+    assert extracted["benefits"] == ["Medical", "Transport"]
+    assert extracted["company"] == "Unknown"